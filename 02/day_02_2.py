@@ -1,29 +1,267 @@
 #!/usr/bin/env python3
-from typing import Tuple
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple, Union
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import Event
+from multiprocessing.synchronize import Event as EventType
+import argparse
 import os
 import sys
 
 sys.path.insert(1, os.path.join(sys.path[0], '..'))
-from Intcode import Computer, read_program, Program
+from Intcode import BatchRunner, Computer, Instruction, read_program, Program
+
+TARGET = 19690720
 
 def main():
+    parser = argparse.ArgumentParser(description='Find the noun and verb that produce a target value')
+    parser.add_argument('--target', type=int, default=TARGET)
+    parser.add_argument('--min', type=int, default=0, help='smallest noun/verb to try')
+    parser.add_argument('--max', type=int, default=99, help='largest noun/verb to try')
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--symbolic', action='store_true', help='solve in closed form if the program allows it')
+    args = parser.parse_args()
+
     program = read_program()
-    noun, verb = find_noun_verb(program)
+    values = range(args.min, args.max + 1)
+
+    if args.symbolic:
+        noun, verb = solve_noun_verb(program, args.target, values, args.processes)
+    else:
+        noun, verb = find_noun_verb(program, args.target, values, args.processes)
     result = 100 * noun + verb
     print(f'Noun: {noun}')
     print(f'Verb: {verb}')
     print(f'Result: {result}')
 
-def find_noun_verb(program: Program) -> Tuple[int, int]:
-    for noun in range(100):
-        for verb in range(100):
-            computer = Computer(program.copy())
-            computer.write_at(1, noun)
-            computer.write_at(2, verb)
-            computer.run()
-            value = computer.read_at(0)
+def find_noun_verb(program: Program, target: int=TARGET, values: range=range(100), processes: Optional[int]=None) -> Tuple[int, int]:
+    """Search every noun/verb pair in values for one producing target.
+
+    The nouns are dealt out to the workers in interleaved shards. As soon
+    as one worker finds a match the others stop at their next run, so with
+    more than one match any of them may be returned.
+    """
+    found = Event()
+
+    if not processes or processes <= 1:
+        init_worker(program, found)
+        match = search_nouns(list(values), values, target)
+    else:
+        shards = [list(values[i::processes]) for i in range(processes)]
+
+        with ProcessPoolExecutor(processes, initializer=init_worker, initargs=(program, found)) as executor:
+            pending = {executor.submit(search_nouns, shard, values, target) for shard in shards}
+            match = None
+
+            while pending and not match:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    match = match or future.result()
+
+            found.set()
+
+    if not match:
+        raise RuntimeError('Did not find noun and verb')
+    return match
+
+runner: Optional[BatchRunner] = None
+found_event: Optional[EventType] = None
+
+def init_worker(program: Program, found: EventType):
+    global runner, found_event
+    runner = BatchRunner(program)
+    found_event = found
+
+def search_nouns(nouns: List[int], verbs: range, target: int) -> Optional[Tuple[int, int]]:
+    assert runner and found_event
+
+    for noun in nouns:
+        for verb in verbs:
+            if found_event.is_set():
+                return None
+
+            computer = runner.run(patch={1: noun, 2: verb})
+            if computer.read_at(0) == target:
+                found_event.set()
+                return noun, verb
+
+    return None
+
+class SymbolicBranch(Exception):
+    """The program used noun/verb for control flow or to write memory."""
+
+class Unknown:
+    """A value read through a symbolic address.
+
+    Arithmetic on it gives another unknown, anything else raises
+    SymbolicBranch, as for Polynomial.
+    """
+    def __add__(self, other: object) -> Unknown:
+        return self
+
+    __radd__ = __mul__ = __rmul__ = __add__
+
+    def branch(self, *_) -> bool:
+        raise SymbolicBranch()
+
+    __eq__ = __ne__ = __lt__ = __le__ = __gt__ = __ge__ = branch  # type: ignore
+
+    def __index__(self) -> int:
+        raise SymbolicBranch()
+
+    def __hash__(self) -> int:
+        raise SymbolicBranch()
+
+UNKNOWN = Unknown()
+
+# Exponents of noun and verb in a term
+Monomial = Tuple[int, int]
+
+class Polynomial:
+    """Integer polynomial in the noun and verb.
+
+    Arithmetic results that turn out constant are returned as plain ints, so
+    a Polynomial always depends on noun or verb. Using one as an address,
+    comparing it or branching on it raises SymbolicBranch.
+    """
+    def __init__(self, terms: Dict[Monomial, int]):
+        self.terms = terms
+
+    @staticmethod
+    def create(terms: Dict[Monomial, int]) -> Union[Polynomial, int]:
+        terms = {monomial: c for monomial, c in terms.items() if c != 0}
+        if not terms.keys() - {(0, 0)}:
+            return terms.get((0, 0), 0)
+        return Polynomial(terms)
+
+    def __add__(self, other: Union[Polynomial, int]) -> Union[Polynomial, int]:
+        if isinstance(other, Unknown):
+            return NotImplemented
+        terms = self.terms.copy()
+        for monomial, c in as_terms(other).items():
+            terms[monomial] = terms.get(monomial, 0) + c
+        return Polynomial.create(terms)
+
+    __radd__ = __add__
+
+    def __mul__(self, other: Union[Polynomial, int]) -> Union[Polynomial, int]:
+        if isinstance(other, Unknown):
+            return NotImplemented
+        terms: Dict[Monomial, int] = {}
+        for (n1, v1), c1 in self.terms.items():
+            for (n2, v2), c2 in as_terms(other).items():
+                monomial = (n1 + n2, v1 + v2)
+                terms[monomial] = terms.get(monomial, 0) + c1 * c2
+        return Polynomial.create(terms)
+
+    __rmul__ = __mul__
+
+    def branch(self, *_) -> bool:
+        raise SymbolicBranch()
+
+    __eq__ = __ne__ = __lt__ = __le__ = __gt__ = __ge__ = branch  # type: ignore
+
+    def __index__(self) -> int:
+        raise SymbolicBranch()
+
+    def __hash__(self) -> int:
+        raise SymbolicBranch()
+
+    def evaluate_noun(self, noun: int) -> Dict[int, int]:
+        """Substitute the noun, giving coefficients of powers of the verb."""
+        coefficients: Dict[int, int] = {}
+        for (n, v), c in self.terms.items():
+            coefficients[v] = coefficients.get(v, 0) + c * noun ** n
+        return coefficients
+
+    def __str__(self) -> str:
+        terms: List[str] = []
+        for (n, v), c in sorted(self.terms.items(), reverse=True):
+            factors = [str(c)] if c != 1 or n == v == 0 else []
+            factors += ['noun' if n == 1 else f'noun^{n}'] if n else []
+            factors += ['verb' if v == 1 else f'verb^{v}'] if v else []
+            terms.append('*'.join(factors))
+        return ' + '.join(terms)
+
+def as_terms(value: Union[Polynomial, int]) -> Dict[Monomial, int]:
+    if isinstance(value, Polynomial):
+        return value.terms
+    return {(0, 0): value}
+
+NOUN = Polynomial({(1, 0): 1})
+VERB = Polynomial({(0, 1): 1})
+
+class SymbolicComputer(Computer):
+    """Runs a program whose memory may hold Polynomial and Unknown values.
+
+    Uses the reference interpreter so every access goes through read_at and
+    write_at.
+    """
+    def __init__(self, program: Program):
+        super().__init__(program, log_output=False, fast=False)
+
+    def read_at(self, index: int) -> int:
+        if not isinstance(index, int):
+            return UNKNOWN  # type: ignore
+        return super().read_at(index)
+
+    def write_at(self, index: int, value: int):
+        if not isinstance(index, int):
+            raise SymbolicBranch()
+        super().write_at(index, value)
+
+    def read_instruction(self) -> Instruction:
+        # A jump to a symbolic address, or into symbolic memory
+        if not isinstance(self.instruction_pointer, int) or not isinstance(self.read_at(self.instruction_pointer), int):
+            raise SymbolicBranch()
+        return super().read_instruction()
+
+def solve_noun_verb(program: Program, target: int=TARGET, values: range=range(100), processes: Optional[int]=None) -> Tuple[int, int]:
+    """Run the program once with symbolic noun and verb and solve for target.
+
+    Falls back to find_noun_verb if the program uses either value for
+    anything but arithmetic.
+    """
+    computer = SymbolicComputer(program)
+    computer.write_at(1, NOUN)  # type: ignore
+    computer.write_at(2, VERB)  # type: ignore
+
+    try:
+        computer.run()
+    except SymbolicBranch:
+        print('Program branches on noun/verb, falling back to search')
+        return find_noun_verb(program, target, values, processes)
+
+    result = computer.read_at(0)
+    if isinstance(result, Unknown):
+        print('Result depends on memory addressed by noun/verb, falling back to search')
+        return find_noun_verb(program, target, values, processes)
+
+    if not isinstance(result, Polynomial):
+        if result == target:
+            return values[0], values[0]
+        raise RuntimeError('Did not find noun and verb')
+
+    print('Closed form:', result)
+
+    for noun in values:
+        coefficients = result.evaluate_noun(noun)
+        remainder = target - coefficients.pop(0, 0)
+
+        if coefficients.keys() <= {1}:
+            # Linear in the verb, solve directly
+            slope = coefficients.get(1, 0)
+            if slope == 0:
+                if remainder == 0:
+                    return noun, values[0]
+                continue
+            verb, r = divmod(remainder, slope)
+            if r == 0 and verb in values:
+                return noun, verb
+            continue
 
-            if value == 19690720:
+        for verb in values:
+            if sum(c * verb ** power for power, c in coefficients.items()) == remainder:
                 return noun, verb
 
     raise RuntimeError('Did not find noun and verb')
@@ -0,0 +1,48 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations
+import os
+import sys
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from Intcode import Computer, Pipeline, Program
+
+def boot_amplifiers(program: Program, phases: Iterable[int]) -> Dict[int, Computer]:
+    """Boot one amplifier per phase setting, paused waiting for its first
+    signal.
+
+    Every amplifier runs the same program, so the booted state depends on
+    the phase alone and can be forked for any position in the chain.
+    """
+    amplifiers: Dict[int, Computer] = {}
+    for phase in phases:
+        amplifier = Computer(program, log_output=False)
+        amplifier.run([phase])
+        amplifiers[phase] = amplifier
+    return amplifiers
+
+def run_settings(amplifiers: Dict[int, Computer], settings: Sequence[int], feedback: bool) -> int:
+    pipeline = Pipeline([amplifiers[phase].fork() for phase in settings], feedback)
+    return pipeline.run(0)
+
+booted: Dict[int, Computer] = {}
+
+def init_worker(program: Program, phases: List[int]):
+    global booted
+    booted = boot_amplifiers(program, phases)
+
+def run_chunk(chunk: List[Tuple[int, ...]], feedback: bool) -> int:
+    return max(run_settings(booted, settings, feedback) for settings in chunk)
+
+def find_max_signal(program: Program, phases: List[int], feedback: bool=False, processes: Optional[int]=None) -> int:
+    """Highest signal over every ordering of the phase settings."""
+    all_settings = list(permutations(phases))
+
+    if not processes or processes <= 1:
+        amplifiers = boot_amplifiers(program, phases)
+        return max(run_settings(amplifiers, settings, feedback) for settings in all_settings)
+
+    processes = min(processes, len(all_settings))
+    chunks = [all_settings[i::processes] for i in range(processes)]
+    with ProcessPoolExecutor(processes, initializer=init_worker, initargs=(program, phases)) as executor:
+        return max(executor.map(run_chunk, chunks, [feedback] * len(chunks)))
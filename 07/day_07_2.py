@@ -1,39 +1,20 @@
 #!/usr/bin/env python3
-from typing import List
+import argparse
 import os
 import sys
-from itertools import permutations
 
 sys.path.insert(1, os.path.join(sys.path[0], '..'))
-from Intcode import Computer, read_program
+from Intcode import read_program
+from amplifiers import find_max_signal
 
 
 def main():
-    program = read_program()
-
-    max_signal = 0
-
-    for settings in permutations([5,6,7,8,9]):
-
-        amplifiers: List[Computer] = []
-
-        for phase_setting in settings:
-            amplifier = Computer(program.copy())
-            amplifier.run([phase_setting])
-            amplifiers.append(amplifier)
-
-        signal = 0
-        current_amplifier = 0
-        while not amplifiers[-1].halted:
-            amplifier = amplifiers[current_amplifier]
-            amplifier.run([signal])
-            assert amplifier.output is not None
-            signal = amplifier.output
-            current_amplifier = (current_amplifier + 1) % len(amplifiers)
-
-        if signal > max_signal:
-            max_signal = signal
+    parser = argparse.ArgumentParser(description='Find the highest amplifier signal with feedback')
+    parser.add_argument('--processes', type=int, default=1)
+    args = parser.parse_args()
 
+    program = read_program()
+    max_signal = find_max_signal(program, [5,6,7,8,9], feedback=True, processes=args.processes)
     print('Max signal:', max_signal)
 
 if __name__ == '__main__':
@@ -7,7 +7,7 @@ from Intcode import Computer, read_program
 
 def main():
     program = read_program()
-    computer = Computer(program)
+    computer = Computer(program, jit=True)
     computer.run([2])
 
 
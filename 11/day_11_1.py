@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 from __future__ import annotations
-from typing import Set
 from enum import IntEnum
 from dataclasses import dataclass
 import os
 import sys
 
 sys.path.insert(1, os.path.join(sys.path[0], '..'))
+from Grid import DenseGrid
 from Intcode import Computer, read_program
 
 class Color(IntEnum):
@@ -42,22 +42,21 @@ class Rotation(IntEnum):
     RIGHT = 1
 
 
+# Panel flag alongside the color bit
+PAINTED = 2
+
 class Hull:
     def __init__(self):
-        self.map: Set[Point] = set()
-        self.painted: Set[Point] = set()
+        self.map = DenseGrid()
 
     def set_color(self, point: Point, color: Color):
-        self.painted.add(point)
-        if color == Color.WHITE:
-            self.map.add(point)
-        elif color == Color.BLACK:
-            self.map.discard(point)
+        self.map.set(point.x, point.y, PAINTED | color)
 
     def get_color(self, point: Point):
-        if point in self.map:
-            return Color.WHITE
-        return Color.BLACK
+        return Color(self.map.get(point.x, point.y) & Color.WHITE)
+
+    def painted_count(self) -> int:
+        return self.map.count(PAINTED | Color.BLACK) + self.map.count(PAINTED | Color.WHITE)
 
 
 class Robot:
@@ -103,7 +102,7 @@ def main():
 
         computer.run([robot.detect_color()])
 
-    print('Painted panels:', len(hull.painted))
+    print('Painted panels:', hull.painted_count())
 
 if __name__ == '__main__':
     main()
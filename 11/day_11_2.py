@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 from __future__ import annotations
-from typing import Set
 from enum import IntEnum
 from dataclasses import dataclass
 import os
 import sys
 
 sys.path.insert(1, os.path.join(sys.path[0], '..'))
+from Grid import DenseGrid
 from Intcode import Computer, read_program
 
 class Color(IntEnum):
@@ -42,41 +42,26 @@ class Rotation(IntEnum):
     RIGHT = 1
 
 
+# Panel flag alongside the color bit
+PAINTED = 2
+
 class Hull:
     def __init__(self):
-        self.map: Set[Point] = set()
-        self.painted: Set[Point] = set()
+        self.map = DenseGrid()
 
     def set_color(self, point: Point, color: Color):
-        self.painted.add(point)
-        if color == Color.WHITE:
-            self.map.add(point)
-        elif color == Color.BLACK:
-            self.map.discard(point)
+        self.map.set(point.x, point.y, PAINTED | color)
 
     def get_color(self, point: Point):
-        if point in self.map:
-            return Color.WHITE
-        return Color.BLACK
-
-    def __str__(self) -> str:
-        output = ''
+        return Color(self.map.get(point.x, point.y) & Color.WHITE)
 
-        x_min = min(p.x for p in self.map)
-        x_max = max(p.x for p in self.map)
-        y_min = min(p.y for p in self.map)
-        y_max = max(p.y for p in self.map)
+    def painted_count(self) -> int:
+        return self.map.count(PAINTED | Color.BLACK) + self.map.count(PAINTED | Color.WHITE)
 
-        for y in range(y_max, y_min - 1, -1):
-            for x in range(x_min, x_max + 1):
-                if Point(x,y) in self.map:
-                    output += '#'
-                else:
-                    output += ' '
-
-            output += '\n'
-
-        return output
+    def __str__(self) -> str:
+        white = PAINTED | Color.WHITE
+        chars = {value: '#' if value == white else ' ' for value in range(4)}
+        return self.map.render(chars, self.map.bounds([white]), reverse=True)
 
 
 class Robot:
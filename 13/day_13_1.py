@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
 from enum import IntEnum
 from typing import NamedTuple, Dict
-from collections import defaultdict
 import os
 import sys
 
 sys.path.insert(1, os.path.join(sys.path[0], '..'))
+from Grid import DenseGrid
 from Intcode import Computer, read_program
 
 class TileType(IntEnum):
@@ -15,7 +15,7 @@ class TileType(IntEnum):
     HORIZONTAL_PADDLE = 3
     BALL = 4
 
-TILE_CHARS = {
+TILE_CHARS: Dict[int, str] = {
     TileType.EMPTY: ' ',
     TileType.WALL: '█',
     TileType.BLOCK: '▒',
@@ -27,28 +27,31 @@ class Point(NamedTuple):
     x: int
     y: int
 
+# Cells no tile has been drawn on
+UNSET = 255
+
 class Grid:
+    """Tiles in a DenseGrid, with the number of each tile type kept up to
+    date as tiles are set."""
     def __init__(self):
-        self.grid: Dict[Point, TileType] = defaultdict(lambda: TileType.EMPTY)
+        self.grid = DenseGrid(fill=UNSET)
+        self.counts = [0] * len(TileType)
 
     def set_tile(self, point: Point, tile_type: TileType):
-        self.grid[point] = tile_type
+        previous = self.grid.get(point.x, point.y)
+        if previous != UNSET:
+            self.counts[previous] -= 1
+        self.grid.set(point.x, point.y, tile_type)
+        self.counts[tile_type] += 1
 
     def __str__(self):
-        output = ''
-
-        x_max = max(p.x for p in self.grid)
-        y_max = max(p.y for p in self.grid)
-
-        for y in range(0, y_max + 1):
-            for x in range(0, x_max + 1):
-                tile_type = self.grid[Point(x,y)]
-                output += TILE_CHARS[tile_type]
-            output += '\n'
-        return output
+        assert self.grid.extent
+        _, _, x_max, y_max = self.grid.extent
+        chars: Dict[int, str] = {**TILE_CHARS, UNSET: TILE_CHARS[TileType.EMPTY]}
+        return self.grid.render(chars, (0, 0, x_max, y_max))
 
     def count_of_type(self, tile_type: TileType) -> int:
-        return list(self.grid.values()).count(tile_type)
+        return self.counts[tile_type]
 
 def main():
     program = read_program()
@@ -1,12 +1,15 @@
 #!/usr/bin/env python3
 from enum import IntEnum
-from typing import NamedTuple, Dict, Optional
-from collections import defaultdict
+from typing import Callable, NamedTuple, Dict, List, Optional, Tuple
+import argparse
 import os
 import sys
+import time
 
 sys.path.insert(1, os.path.join(sys.path[0], '..'))
-from Intcode import Computer, read_program
+from Grid import DenseGrid
+from Intcode import CallbackChannel, Computer, read_program
+from Renderer import Renderer, TileDiff
 
 class TileType(IntEnum):
     EMPTY = 0
@@ -15,7 +18,7 @@ class TileType(IntEnum):
     HORIZONTAL_PADDLE = 3
     BALL = 4
 
-TILE_CHARS = {
+TILE_CHARS: Dict[int, str] = {
     TileType.EMPTY: ' ',
     TileType.WALL: '█',
     TileType.BLOCK: '▒',
@@ -27,28 +30,36 @@ class Point(NamedTuple):
     x: int
     y: int
 
+# Cells no tile has been drawn on
+UNSET = 255
+
 class Grid:
+    """Tiles in a DenseGrid, with the number of each tile type and the
+    positions of the ball and paddle kept up to date as tiles are set."""
     def __init__(self):
-        self.grid: Dict[Point, TileType] = defaultdict(lambda: TileType.EMPTY)
+        self.grid = DenseGrid(fill=UNSET)
+        self.counts = [0] * len(TileType)
+        self.positions: Dict[TileType, Point] = {}
 
     def set_tile(self, point: Point, tile_type: TileType):
-        self.grid[point] = tile_type
+        previous = self.grid.get(point.x, point.y)
+        if previous != UNSET:
+            self.counts[previous] -= 1
+            if self.positions.get(TileType(previous)) == point:
+                del self.positions[TileType(previous)]
+        self.grid.set(point.x, point.y, tile_type)
+        self.counts[tile_type] += 1
+        if tile_type in (TileType.BALL, TileType.HORIZONTAL_PADDLE):
+            self.positions[tile_type] = point
 
     def __str__(self) -> str:
-        output = ''
-
-        x_max = max(p.x for p in self.grid)
-        y_max = max(p.y for p in self.grid)
-
-        for y in range(0, y_max + 1):
-            for x in range(0, x_max + 1):
-                tile_type = self.grid[Point(x,y)]
-                output += TILE_CHARS[tile_type]
-            output += '\n'
-        return output
+        assert self.grid.extent
+        _, _, x_max, y_max = self.grid.extent
+        chars: Dict[int, str] = {**TILE_CHARS, UNSET: TILE_CHARS[TileType.EMPTY]}
+        return self.grid.render(chars, (0, 0, x_max, y_max))
 
     def count_of_type(self, tile_type: TileType) -> int:
-        return list(self.grid.values()).count(tile_type)
+        return self.counts[tile_type]
 
     def ball_position(self) -> Point:
         position = self.find_tile_position(TileType.BALL)
@@ -61,10 +72,7 @@ class Grid:
         return position
 
     def find_tile_position(self, tile_type: TileType) -> Optional[Point]:
-        for point, point_tile_type in self.grid.items():
-            if tile_type == point_tile_type:
-                return point
-        return None
+        return self.positions.get(tile_type)
 
 
 class Game:
@@ -83,16 +91,28 @@ class Game:
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Play breakout')
+    parser.add_argument('--render', action='store_true', help='show the game as it is played')
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--controller', choices=list(CONTROLLERS), default='greedy')
+    args = parser.parse_args()
+
+    controller = CONTROLLERS[args.controller]
+    start = time.perf_counter()
+    runs = 1
+
     program = read_program()
     program[0] = 2
     computer = Computer(program, log_output=False)
     computer.run()
 
+    renderer = Renderer(TILE_CHARS, args.fps) if args.render else None
 
     grid = Grid()
     game = Game(grid)
 
     while True:
+        diffs: List[TileDiff] = []
 
         while computer.outputs:
             x = computer.get_output()
@@ -104,28 +124,93 @@ def main():
             else:
                 tile_type = TileType(computer.get_output())
                 grid.set_tile(Point(x,y), tile_type)
+                diffs.append((x, y, tile_type))
+
+        if renderer:
+            renderer.push(diffs, f'Score: {game.score}')
 
         if computer.halted:
             break
 
         if computer.waiting_for_input:
-            ball_position = grid.ball_position()
-            paddle_position = grid.paddle_position()
-
-            if ball_position.x < paddle_position.x:
-                joystick = -1
-            elif ball_position.x > paddle_position.x:
-                joystick = 1
-            else:
-                joystick = 0
+            computer.run(controller(computer, grid))
+            runs += 1
 
-            computer.run([joystick])
+    seconds = time.perf_counter() - start
 
-        os.system('clear')
+    if renderer:
+        renderer.close()
+    else:
         print(game)
-
-    os.system('clear')
-    print(game)
+    print(f'{args.controller} controller: {runs} runs in {seconds:.3f}s')
+
+def move_towards(paddle_x: int, x: int) -> int:
+    return (x > paddle_x) - (x < paddle_x)
+
+def greedy_controller(computer: Computer, grid: Grid) -> List[int]:
+    """Move the paddle one step towards the ball."""
+    return [move_towards(grid.paddle_position().x, grid.ball_position().x)]
+
+def predict_landing(computer: Computer, paddle_row: int, joystick: List[int]) -> Tuple[int, Optional[int]]:
+    """Frames until the ball next reaches the row above the paddle, and
+    its x position there.
+
+    The paddle only affects the ball as it bounces, so a fork that is given
+    the joystick inputs and then holds still follows the same path. The fork
+    is run in one go, stopping for input once the ball arrives. The position
+    is None if the game ends first.
+    """
+    fork = computer.fork()
+    frames = 0
+    landing: Optional[int] = None
+    tile: List[int] = []
+
+    def get_joystick() -> Optional[int]:
+        nonlocal frames
+        if landing is not None:
+            return None
+        frames += 1
+        return joystick[frames - 1] if frames <= len(joystick) else 0
+
+    def put_output(value: int):
+        nonlocal landing
+        tile.append(value)
+        if len(tile) == 3:
+            x, y, tile_type = tile
+            tile.clear()
+            if x != -1 and tile_type == TileType.BALL and y == paddle_row - 1:
+                landing = x
+
+    fork.inputs = CallbackChannel(get=get_joystick)
+    fork.outputs = CallbackChannel(put=put_output)
+    fork.run()
+    return frames, landing
+
+def lookahead_controller(computer: Computer, grid: Grid) -> List[int]:
+    """Every joystick input until the ball next reaches the paddle row,
+    moving the paddle to where it will land."""
+    paddle = grid.paddle_position()
+    ball = grid.ball_position()
+
+    # A ball above the paddle row bounces on the next frame if the paddle
+    # ends that frame underneath it
+    joystick: List[int] = []
+    if ball.y == paddle.y - 1:
+        joystick.append(move_towards(paddle.x, ball.x))
+
+    frames, landing = predict_landing(computer, paddle.y, joystick)
+    if landing is None:
+        return joystick + [0] * (frames - len(joystick))
+
+    paddle_x = paddle.x + sum(joystick)
+    remaining = frames - len(joystick)
+    steps = min(abs(landing - paddle_x), remaining)
+    return joystick + [move_towards(paddle_x, landing)] * steps + [0] * (remaining - steps)
+
+CONTROLLERS: Dict[str, Callable[[Computer, Grid], List[int]]] = {
+    'greedy': greedy_controller,
+    'lookahead': lookahead_controller,
+}
 
 
 if __name__ == '__main__':
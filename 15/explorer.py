@@ -0,0 +1,103 @@
+from typing import Callable, Deque, Dict, Optional, Tuple
+from collections import deque
+import math
+import os
+import sys
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from Grid import DenseGrid
+from Intcode import Computer, Program
+
+Point = Tuple[int, int]
+
+# Droid responses
+WALL = 0
+EMPTY = 1
+OXYGEN = 2
+# Cells that haven't been tried yet
+UNKNOWN = 3
+
+# Movement commands and the way they move the droid
+MOVES = {
+    1: (0, -1),
+    2: (0, 1),
+    3: (-1, 0),
+    4: (1, 0),
+}
+
+def neighbours(point: Point):
+    x, y = point
+    for dx, dy in MOVES.values():
+        yield x + dx, y + dy
+
+class Explorer:
+    """Maps the area reachable by the repair droid in one breadth-first pass.
+
+    Every open cell on the frontier keeps a droid standing on it, and each
+    unexplored direction from it is tried on a fork of that droid, so cells
+    are discovered in order of distance from the start whatever the shape
+    of the maze.
+
+    Once the oxygen system is found, the minutes for oxygen to reach each
+    known cell are kept up to date as more cells are discovered, so both
+    answers are ready when the exploration ends.
+    """
+    def __init__(self, program: Program):
+        start = (0, 0)
+        self.tiles = DenseGrid(fill=UNKNOWN)
+        self.tiles.set(*start, EMPTY)
+        self.distances: Dict[Point, int] = {start: 0}
+        self.oxygen: Optional[Point] = None
+        self.oxygen_minutes: Dict[Point, int] = {}
+        self.droids: Deque[Tuple[Point, Computer]] = deque([(start, Computer(program, log_output=False))])
+
+    def explore(self, on_tile: Optional[Callable[[Point, int], None]]=None):
+        while self.droids:
+            point, droid = self.droids.popleft()
+            x, y = point
+            moves = [
+                (command, (x + dx, y + dy)) for command, (dx, dy) in MOVES.items()
+                if self.tiles.get(x + dx, y + dy) == UNKNOWN
+            ]
+
+            for i, (command, neighbour) in enumerate(moves):
+                # The last direction can use the droid itself
+                moved = droid if i == len(moves) - 1 else droid.fork()
+                moved.run([command])
+                response = moved.get_output()
+
+                self.tiles.set(*neighbour, response)
+                if on_tile:
+                    on_tile(neighbour, response)
+                if response == WALL:
+                    continue
+
+                self.distances[neighbour] = self.distances[point] + 1
+                self.droids.append((neighbour, moved))
+
+                if response == OXYGEN:
+                    self.oxygen = neighbour
+                    self.spread_oxygen(neighbour, 0)
+                elif self.oxygen:
+                    minutes = min(self.oxygen_minutes.get(p, math.inf) for p in neighbours(neighbour))
+                    self.spread_oxygen(neighbour, int(minutes) + 1)
+
+    def spread_oxygen(self, point: Point, minutes: int):
+        """Lower the minutes for oxygen to reach point, and any known cells
+        that now get oxygen sooner through it."""
+        queue = deque([(point, minutes)])
+        while queue:
+            point, minutes = queue.popleft()
+            if minutes >= self.oxygen_minutes.get(point, math.inf):
+                continue
+            self.oxygen_minutes[point] = minutes
+            for neighbour in neighbours(point):
+                if self.tiles.get(*neighbour) not in (WALL, UNKNOWN):
+                    queue.append((neighbour, minutes + 1))
+
+    def oxygen_distance(self) -> int:
+        assert self.oxygen
+        return self.distances[self.oxygen]
+
+    def minutes_to_fill(self) -> int:
+        return max(self.oxygen_minutes.values())
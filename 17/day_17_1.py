@@ -3,32 +3,27 @@ import os
 import sys
 
 sys.path.insert(1, os.path.join(sys.path[0], '..'))
+from Grid import DenseGrid
 from Intcode import Computer, read_program
 
+SCAFFOLD = ord('#')
+
 def main():
     program = read_program()
     computer = Computer(program, log_output=False)
     computer.run()
-    output = ''
-
-    while computer.outputs:
-        output += chr(computer.get_output())
-
-    output_lines = output.strip().split('\n')
+    output = computer.get_ascii_output()
 
-    width = len(output_lines[0])
-    height = len(output_lines)
+    grid = DenseGrid.from_text(output.strip().split('\n'), fill='.')
+    counts = grid.neighbour_counts([SCAFFOLD])
 
     sum_alignment_params = 0
 
-    for y in range(1, height-1):
-        for x in range(1, width-1):
-            if output_lines[y][x] == '#' and \
-                    output_lines[y-1][x] == '#' and \
-                    output_lines[y+1][x] == '#' and \
-                    output_lines[y][x-1] == '#' and \
-                    output_lines[y][x+1] == '#':
-                sum_alignment_params += x * y
+    # Intersections are scaffold with scaffold on all four sides
+    for index in grid.find_all(SCAFFOLD):
+        if counts[index] == 4:
+            x, y = grid.point(index)
+            sum_alignment_params += x * y
 
     print('Alignment Parameters Sum:', sum_alignment_params)
 
@@ -7,6 +7,7 @@ import sys
 from typing import List
 
 sys.path.insert(1, os.path.join(sys.path[0], '..'))
+from Grid import DenseGrid
 from Intcode import Computer, read_program
 
 class Direction(IntEnum):
@@ -42,31 +43,25 @@ class Robot:
 
 
 class Map:
-    grid: List[List[str]]
+    grid: DenseGrid
     robot: Robot
 
     def __init__(self, map_str: str):
-        self.grid = [list(line) for line in map_str.split('\n')]
-        self.width = len(self.grid[0])
-        self.height = len(self.grid)
+        self.grid = DenseGrid.from_text(map_str.split('\n'), fill=EMPTY_CHAR)
+        self.width = self.grid.width
+        self.height = self.grid.height
         self.find_robot()
         print(self.robot)
 
     def find_robot(self):
-        for y in range(self.height):
-            for x in range(self.width):
-                cell = self.grid[y][x]
-
-                if cell in DIRECTION_CHARS:
-                    direction = DIRECTION_CHARS[cell]
-                    self.robot = Robot(x, y, direction)
-                    self.grid[y][x] = WALL_CHAR
+        for char, direction in DIRECTION_CHARS.items():
+            for index in self.grid.find_all(ord(char)):
+                x, y = self.grid.point(index)
+                self.robot = Robot(x, y, direction)
+                self.grid.cells[index] = ord(WALL_CHAR)
 
     def get_cell(self, x: int, y: int):
-        if x < 0 or x >= self.width or y < 0 or y >= self.height:
-            return EMPTY_CHAR
-
-        return self.grid[y][x]
+        return chr(self.grid.get(x, y))
 
     def get_next_position(self, direction: Direction):
         next_x = self.robot.x
@@ -107,20 +102,11 @@ class Map:
         return None
 
     def __str__(self):
-        output = ''
-
-        for y, line in enumerate(self.grid):
-            for x, char in enumerate(line):
-                if self.robot.y == y and self.robot.x == x:
-                    for char, dir in DIRECTION_CHARS.items():
-                        if dir == self.robot.direction:
-                            output += char
-                            break
-                else:
-                    output += char
-            output += '\n'
-
-        return output
+        robot_char = next(char for char, dir in DIRECTION_CHARS.items() if dir == self.robot.direction)
+        lines = self.grid.render({}).split('\n')
+        line = lines[self.robot.y]
+        lines[self.robot.y] = line[:self.robot.x] + robot_char + line[self.robot.x + 1:]
+        return '\n'.join(lines)
 
 def main():
     program = read_program()
@@ -187,10 +173,7 @@ def main():
     print(computer.get_output())
 
 def print_computer_text(computer: Computer):
-    output = ''
-    while computer.outputs:
-        output += chr(computer.get_output())
-    print(output)
+    print(computer.get_ascii_output())
 
 def str_to_ascii(s: str):
     return [ord(c) for c in s]
@@ -1,5 +1,10 @@
 #!/usr/bin/env python3
-from typing import List, NamedTuple, Set, Dict
+from typing import List, NamedTuple
+import os
+import sys
+
+sys.path.insert(1, os.path.join(sys.path[0], '..'))
+from State import StatePacker
 
 class Vault(NamedTuple):
     plan: str
@@ -15,89 +20,80 @@ class GameState(NamedTuple):
     player: Point
     keys: int
 
-DIRECTIONS = [
-    Point(-1, 0),
-    Point(1, 0),
-    Point(0, -1),
-    Point(0, 1)
-]
-
 def main():
     vault, game_state = read_vault()
 
-    next_game_states = [game_state]
-
-    discovered: Set[GameState] = {game_state}
-    dist: Dict[GameState, int] = {game_state: 0}
+    # Game states pack the player's cell index with the keys above it
+    packer = StatePacker(len(vault.plan), vault.all_keys + 1)
+    keys_shift = packer.shifts[1]
+    state = packer.pack(game_state.player.y * vault.width + game_state.player.x, game_state.keys)
 
-    success_state = None
+    discovered = packer.visited()
+    discovered.add(state)
+    next_game_states = [state]
+    steps = 0
 
     while next_game_states:
-        game_state = next_game_states.pop(0)
-        # print_vault(vault, game_state)
+        game_states = next_game_states
+        next_game_states = []
 
-        if vault.all_keys == game_state.keys:
-            success_state = game_state
-            break
+        for state in game_states:
+            # print_vault(vault, packer, state)
 
-        new_game_states = generate_next_game_states(vault, game_state)
+            if vault.all_keys == state >> keys_shift:
+                print('Steps:', steps)
+                return
 
-        for new_game_state in new_game_states:
-            if new_game_state not in discovered:
-                next_game_states.append(new_game_state)
-                discovered.add(new_game_state)
-                dist[new_game_state] = dist[game_state] + 1
+            for new_state in generate_next_game_states(vault, keys_shift, state):
+                if discovered.add(new_state):
+                    next_game_states.append(new_state)
 
-    if success_state:
-        print('Steps:', dist[success_state])
+        steps += 1
 
-def print_vault(vault: Vault, game_state: GameState):
+def print_vault(vault: Vault, packer: StatePacker, state: int):
+    player_index, keys = packer.unpack(state)
     output = ''
 
     for y in range(vault.height):
         for x in range(vault.width):
-            if game_state.player.x == x and game_state.player.y == y:
+            if y * vault.width + x == player_index:
                 output += '@'
             else:
                 output += vault.plan[y * vault.width + x]
         output += '\n'
 
     print(output)
-    print('Have Keys: ', game_state.keys)
+    print('Have Keys: ', keys)
     print()
 
-def generate_next_game_states(vault: Vault, game_state: GameState):
-    next_game_states: List[GameState] = []
+def generate_next_game_states(vault: Vault, keys_shift: int, state: int):
+    next_game_states: List[int] = []
+    keys = state >> keys_shift
+    player_index = state - (keys << keys_shift)
 
-    for direction in DIRECTIONS:
-        next_game_state = generate_next_game_state(vault, game_state, direction)
+    for offset in (-1, 1, -vault.width, vault.width):
+        next_game_state = generate_next_game_state(vault, keys_shift, player_index + offset, keys)
 
-        if next_game_state:
+        if next_game_state is not None:
             next_game_states.append(next_game_state)
 
     return next_game_states
 
-def generate_next_game_state(vault: Vault, game_state: GameState, direction: Point):
-    new_player = Point(game_state.player.x + direction.x, game_state.player.y + direction.y)
+def generate_next_game_state(vault: Vault, keys_shift: int, cell_index: int, keys: int):
+    if cell_index < 0 or cell_index >= len(vault.plan): return None
 
-    if new_player.x < 0 or new_player.x >= vault.width: return None
-    if new_player.y < 0 or new_player.y >= vault.height: return None
-
-    cell_index = new_player.y * vault.width + new_player.x
     cell = vault.plan[cell_index]
 
     if cell == '#': return None
 
-    if cell >= 'A' and cell <= 'Z' and ((1 << (ord(cell) - ord('A'))) & game_state.keys) == 0:
+    if cell >= 'A' and cell <= 'Z' and ((1 << (ord(cell) - ord('A'))) & keys) == 0:
         return None
 
-    new_keys = game_state.keys
-
     if cell >= 'a' and cell <= 'z':
         val = ord(cell) - ord('a')
-        new_keys |= 1 << val
+        keys |= 1 << val
 
-    return GameState(new_player, new_keys)
+    return cell_index | keys << keys_shift
 
 
 def replace_at_index(s: str, index: int, new_char: str):
@@ -1,206 +1,128 @@
 #!/usr/bin/env python3
-from typing import List, Tuple, NamedTuple, Set, Dict, Union
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import glob
 import heapq
+import math
+import os
+import sys
+import time
 
-class Vault(NamedTuple):
-    plan: str
-    width: int
-    height: int
-    all_keys: int
+sys.path.insert(1, os.path.join(sys.path[0], '..'))
+from State import StatePacker
+from vault import ROBOT_NODES, PathTable, read_vault
 
-class Point(NamedTuple):
-    x: int
-    y: int
-
-class GameState(NamedTuple):
-    player: Point
-    keys: int
-
-DIRECTIONS = [
-    Point(-1, 0),
-    Point(1, 0),
-    Point(0, -1),
-    Point(0, 1)
-]
+Heuristic = Callable[[int, int], int]
 
 def main():
-    vault, game_state = read_vault()
-
-    key_positions = find_key_positions(vault)
-    seen: Set[GameState] = set()
-    next_states: List[Tuple[int, GameState]] = [(0, game_state)]
-    dist = {game_state: 0}
-
-
-    shortest_paths: Dict[Tuple[Point, Point], Dict[int, Union[int, None]]] = {}
+    parser = argparse.ArgumentParser(description='Collect every key in the vault')
+    parser.add_argument('input', nargs='?', default='input.txt')
+    parser.add_argument('--search', choices=['dijkstra', 'astar'], default='dijkstra')
+    parser.add_argument('--compare', action='store_true', help='count expansions of both searches on every vault')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare()
+        return
+
+    table = PathTable(read_vault(args.input))
+    heuristic = MstHeuristic(table) if args.search == 'astar' else None
+    cost, _ = shortest_path(table, heuristic)
+    print('Shortest Path:', cost)
+
+def compare():
+    directory = os.path.dirname(os.path.abspath(__file__))
+    paths = sorted(glob.glob(os.path.join(directory, 'test_*.txt'))) + [os.path.join(directory, 'input.txt')]
+
+    print(f'{"vault":>10} {"steps":>6} {"dijkstra":>18} {"astar":>18}')
+    for path in paths:
+        table = PathTable(read_vault(path))
+        results = []
+        for heuristic in (None, MstHeuristic(table)):
+            start = time.perf_counter()
+            cost, expansions = shortest_path(table, heuristic)
+            results.append((cost, expansions, time.perf_counter() - start))
+
+        assert results[0][0] == results[1][0]
+        columns = ' '.join(f'{expansions:>8,} {seconds:8.3f}s' for _, expansions, seconds in results)
+        print(f'{os.path.basename(path):>10} {results[0][0]:>6} {columns}')
+
+class MstHeuristic:
+    """A lower bound on the steps left: the distance to the nearest key not
+    yet collected, plus the weight of a minimum spanning tree over all of
+    them.
+
+    Any walk collecting the remaining keys reaches one of them first and
+    then visits the rest, which takes at least a spanning tree's worth of
+    steps, so the bound never overestimates. Doors are ignored. Tree
+    weights are memoized per keyset.
+    """
+    def __init__(self, table: PathTable):
+        self.all_keys = table.vault.all_keys
+        self.distances: Dict[int, Dict[int, int]] = {
+            node: {target: steps for target, steps, _, _ in paths} for node, paths in table.paths.items()
+        }
+        self.trees: Dict[int, int] = {}
+
+    def __call__(self, node: int, keys: int) -> int:
+        remaining = self.all_keys & ~keys
+        if not remaining:
+            return 0
+        nearest = min(steps for target, steps in self.distances[node].items() if (remaining >> target) & 1)
+        return nearest + self.tree_weight(remaining)
+
+    def tree_weight(self, remaining: int) -> int:
+        weight = self.trees.get(remaining)
+        if weight is not None:
+            return weight
+
+        # Prim's algorithm over the complete graph of remaining keys
+        nodes = [key for key in range(remaining.bit_length()) if (remaining >> key) & 1]
+        best = {key: math.inf for key in nodes[1:]}
+        current = nodes[0]
+        weight = 0
+        while best:
+            distances = self.distances[current]
+            for key in best:
+                best[key] = min(best[key], distances[key])
+            current = min(best, key=best.__getitem__)
+            weight += int(best.pop(current))
+
+        self.trees[remaining] = weight
+        return weight
+
+def shortest_path(table: PathTable, heuristic: Optional[Heuristic]=None) -> Tuple[int, int]:
+    """Fewest steps to collect every key, and how many states were expanded
+    to find it. Dijkstra, or A* when given a heuristic."""
+    all_keys = table.vault.all_keys
+    # States pack the node the robot stands on with the keys collected
+    packer = StatePacker(ROBOT_NODES + 1, all_keys + 1)
+    keys_shift = packer.shifts[1]
+
+    start = packer.pack(table.robots[0], 0)
+    dist: Dict[int, int] = {start: 0}
+    next_states: List[Tuple[int, int, int]] = [(heuristic(table.robots[0], 0) if heuristic else 0, 0, start)]
+    expansions = 0
 
     while next_states:
-        _, current_state = heapq.heappop(next_states)
-        # print(next_states)
-        # print(current_state, dist[current_state])
-
-        if current_state in seen:
+        _, cost, current_state = heapq.heappop(next_states)
+        if cost > dist[current_state]:
             continue
 
-        seen.add(current_state)
-
-        if current_state.keys == vault.all_keys:
-            print('Shortest Path:', dist[current_state])
-            break
-
-        new_next_states = get_next_states(vault, key_positions, current_state, shortest_paths)
+        keys = current_state >> keys_shift
+        if keys == all_keys:
+            return cost, expansions
+        expansions += 1
 
-        for next_state, next_state_cost in new_next_states:
-            if next_state in seen:
-                continue
-
-            new_cost = dist[current_state] + next_state_cost
-
-            if next_state not in dist or new_cost < dist[next_state]:
+        for key, steps in table.moves(current_state & packer.masks[0], keys):
+            next_state = key | (keys | (1 << key)) << keys_shift
+            new_cost = cost + steps
+            if new_cost < dist.get(next_state, new_cost + 1):
                 dist[next_state] = new_cost
-                heapq.heappush(next_states, (new_cost, next_state))
-
-
-
-def get_next_states(vault: Vault, key_positions: Dict[str, Point], current_state: GameState, shortest_paths: Dict[Tuple[Point, Point], Dict[int, Union[int, None]]]):
-    next_states: List[Tuple[GameState, int]] = []
-
-    for key, key_pos in key_positions.items():
-        new_key_bit = 1 << ord(key) - ord('a')
-        if new_key_bit & current_state.keys != 0:
-            continue
-
-        shortest_path_length = get_shortest_path(vault, current_state.player, key_pos, current_state.keys, shortest_paths)
-
-        if shortest_path_length is not None:
-            next_states.append((GameState(key_pos, current_state.keys | new_key_bit), shortest_path_length))
-
-    return next_states
-
-
-def find_key_positions(vault: Vault):
-    key_positions: Dict[str, Point] = {}
-
-    for current_key in range(ord('a'), ord('z') + 1):
-        key_index = vault.plan.find(chr(current_key))
-        if key_index == -1: break
-
-        key_positions[chr(current_key)] = Point(key_index % vault.width, key_index // vault.width)
-
-    return key_positions
-
-def is_valid_move(vault: Vault, new_player: Point, with_keys: int):
-
-    if new_player.x < 0 or new_player.x >= vault.width: return False
-    if new_player.y < 0 or new_player.y >= vault.height: return False
-
-    cell_index = new_player.y * vault.width + new_player.x
-    cell = vault.plan[cell_index]
-
-    if cell == '#': return False
-
-    if cell >= 'A' and cell <= 'Z' and ((1 << (ord(cell) - ord('A'))) & with_keys) == 0:
-        return False
-
-    return True
-
-def generate_next_positions(vault: Vault, player: Point, with_keys: int):
-    next_positions: List[Point] = []
-
-    for direction in DIRECTIONS:
-        new_player = Point(player.x + direction.x, player.y + direction.y)
-
-        if is_valid_move(vault, new_player, with_keys):
-            next_positions.append(new_player)
-
-    return next_positions
-
-def get_shortest_path(vault: Vault, from_pos: Point, to_pos: Point, with_keys: int, shortest_paths: Dict[Tuple[Point, Point], Dict[int, Union[int, None]]]):
-    if (from_pos, to_pos) in shortest_paths:
-        shortest_path_options = shortest_paths[(from_pos, to_pos)]
-
-        if with_keys in shortest_path_options:
-            return shortest_path_options[with_keys]
-
-        for keys, cost in shortest_path_options.items():
-            if with_keys & keys == keys and cost is not None:
-                return cost
-
-    shortest_path = find_shortest_path(vault, from_pos, to_pos, with_keys)
-
-    if (from_pos, to_pos) not in shortest_paths:
-        shortest_paths[(from_pos, to_pos)] = {}
-
-    if not shortest_path:
-        shortest_paths[(from_pos, to_pos)][with_keys] = None
-        return None
-
-    shortest_path_cost, required_keys = shortest_path
-
-
-
-    shortest_paths[(from_pos, to_pos)][required_keys] = shortest_path_cost
-
-    return shortest_path_cost
-
-
-def find_shortest_path(vault: Vault, from_pos: Point, to_pos: Point, with_keys: int):
-    next_positions: List[Tuple[Point, int]] = [(from_pos, 0)]
-
-    dist: Dict[Point, int] = {}
-    dist[from_pos] = 0
-
-    visited: Set[Point] = {from_pos}
-
-    while next_positions:
-        current_pos, required_keys = next_positions.pop(0)
-        # print(current_pos)
-
-        if current_pos == to_pos:
-            return (dist[current_pos], required_keys)
-
-        new_positions = generate_next_positions(vault, current_pos, with_keys)
-
-        for new_position in new_positions:
-            this_required_keys = required_keys
-
-            new_cell = vault.plan[new_position.y * vault.width + new_position.x]
-
-            if new_cell >= 'A' and new_cell <= 'Z':
-                this_required_keys |= 1 << (ord(new_cell) - ord('A'))
-
-            if new_position not in visited:
-                visited.add(new_position)
-                dist[new_position] = dist[current_pos] + 1
-                next_positions.append((new_position, this_required_keys))
-
-
-
-def replace_at_index(s: str, index: int, new_char: str):
-    return s[:index] + new_char + s[index+1:]
-
-def read_vault():
-    with open('input.txt') as file:
-        plan_list = [line.strip() for line in file]
-        height = len(plan_list)
-        width = len(plan_list[0])
-
-        plan = ''.join(plan_list)
-
-        player_index = plan.index('@')
-        plan = replace_at_index(plan, player_index, '.')
-        player = Point(player_index % width, player_index // width)
-
-        all_keys = 0
-
-        for y in range(height):
-            for x in range(width):
-                cell = plan_list[y][x]
-                if cell >= 'a' and cell <= 'z':
-                    val = ord(cell) - ord('a')
-                    all_keys |= 1 << val
+                estimate = new_cost + heuristic(key, keys | (1 << key)) if heuristic else new_cost
+                heapq.heappush(next_states, (estimate, new_cost, next_state))
 
-        return (Vault(plan, width, height, all_keys), GameState(player, 0))
+    raise RuntimeError('Could not collect every key')
 
 if __name__ == '__main__':
     main()
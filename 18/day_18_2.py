@@ -1,5 +1,10 @@
 #!/usr/bin/env python3
-from typing import List, NamedTuple, Set, Dict, Tuple
+from typing import List, NamedTuple, Tuple
+import os
+import sys
+
+sys.path.insert(1, os.path.join(sys.path[0], '..'))
+from State import StatePacker
 
 class Point(NamedTuple):
     x: int
@@ -10,103 +15,92 @@ class Vault(NamedTuple):
     width: int
     height: int
     robots: Tuple[Point, Point, Point, Point]
-    remaining_keys: int
-
-DIRECTIONS = [
-    Point(-1, 0),
-    Point(1, 0),
-    Point(0, -1),
-    Point(0, 1)
-]
+    all_keys: int
 
 def main():
     vault = read_vault()
 
-    next_vaults = [vault]
+    # Game states pack the four robots' cell indices, then the keys held.
+    # Holding a key opens its door, so the plan itself never changes.
+    packer = StatePacker(*[len(vault.plan)] * 4, vault.all_keys + 1)
+    state = packer.pack(*(robot.y * vault.width + robot.x for robot in vault.robots), 0)
 
-    discovered: Set[Vault] = {vault}
-    dist: Dict[Vault, int] = {vault: 0}
+    discovered = packer.visited()
+    discovered.add(state)
+    next_states = [state]
+    steps = 0
 
-    success_vault = None
+    while next_states:
+        states = next_states
+        next_states = []
 
-    while next_vaults:
-        vault = next_vaults.pop(0)
-        # print_vault(vault)
+        for state in states:
+            # print_vault(vault, packer, state)
 
-        if vault.remaining_keys == 0:
-            success_vault = vault
-            break
+            if state >> packer.shifts[4] == vault.all_keys:
+                print('Steps:', steps)
+                return
 
-        new_vaults = generate_next_vaults(vault)
+            for new_state in generate_next_states(vault, packer, state):
+                if discovered.add(new_state):
+                    next_states.append(new_state)
 
-        for new_vault in new_vaults:
-            if new_vault not in discovered:
-                next_vaults.append(new_vault)
-                discovered.add(new_vault)
-                dist[new_vault] = dist[vault] + 1
+        steps += 1
 
-    if success_vault:
-        print('Steps:', dist[success_vault])
 
-
-def print_vault(vault: Vault):
+def print_vault(vault: Vault, packer: StatePacker, state: int):
+    *robots, keys = packer.unpack(state)
     output = ''
 
     for y in range(vault.height):
         for x in range(vault.width):
-            output += get_cell(vault, x, y)
+            output += get_cell(vault, robots, keys, y * vault.width + x)
         output += '\n'
 
     print(output)
 
-def get_cell(vault: Vault, x: int, y: int):
-    for robot in vault.robots:
-        if robot.x == x and robot.y == y:
-            return '@'
+def get_cell(vault: Vault, robots: List[int], keys: int, index: int):
+    cell = vault.plan[index]
+
+    if index in robots:
+        return '@'
+    elif cell.isalpha() and (1 << (ord(cell.lower()) - ord('a'))) & keys:
+        return '.'
     else:
-        return vault.plan[y * vault.width + x]
+        return cell
 
-def generate_next_vaults(vault: Vault):
-    next_vaults: List[Vault] = []
+def generate_next_states(vault: Vault, packer: StatePacker, state: int):
+    next_states: List[int] = []
+    keys_shift = packer.shifts[4]
+    keys = state >> keys_shift
 
-    for robot_index in range(4):
-        for direction in DIRECTIONS:
-            next_vault = generate_next_vault(vault, robot_index, direction)
+    for robot_shift in packer.shifts[:4]:
+        robot_index = (state >> robot_shift) & packer.masks[0]
 
-            if next_vault:
-                next_vaults.append(next_vault)
+        for offset in (-1, 1, -vault.width, vault.width):
+            next_state = generate_next_state(vault, state, keys, robot_shift, keys_shift, robot_index, robot_index + offset)
 
-    return next_vaults
+            if next_state is not None:
+                next_states.append(next_state)
 
-def generate_next_vault(vault: Vault, robot_index: int, direction: Point):
-    robot = vault.robots[robot_index]
-    new_robot = Point(robot.x + direction.x, robot.y + direction.y)
+    return next_states
 
-    if new_robot.x < 0 or new_robot.x >= vault.width: return None
-    if new_robot.y < 0 or new_robot.y >= vault.height: return None
+def generate_next_state(vault: Vault, state: int, keys: int, robot_shift: int, keys_shift: int, robot_index: int, cell_index: int):
+    if cell_index < 0 or cell_index >= len(vault.plan): return None
 
-    cell_index = new_robot.y * vault.width + new_robot.x
     cell = vault.plan[cell_index]
 
-    if cell == '#' or (cell >= 'A' and cell <= 'Z'):
-        return None
+    if cell == '#': return None
 
-    new_remaining_keys = vault.remaining_keys
+    if cell >= 'A' and cell <= 'Z' and ((1 << (ord(cell) - ord('A'))) & keys) == 0:
+        return None
 
-    new_plan = vault.plan
+    next_state = state + ((cell_index - robot_index) << robot_shift)
 
     if cell >= 'a' and cell <= 'z':
-        new_remaining_keys -= 1
-        new_plan = replace_at_index(new_plan, cell_index, '.')
-
-        door_index = new_plan.find(cell.upper())
-        if door_index != -1:
-            new_plan = replace_at_index(new_plan, door_index, '.')
-
-    new_robots = list(vault.robots)
-    new_robots[robot_index] = new_robot
+        next_state |= 1 << (ord(cell) - ord('a') + keys_shift)
 
-    return Vault(new_plan, vault.width, vault.height, tuple(new_robots), new_remaining_keys)
+    return next_state
 
 
 def replace_at_index(s: str, index: int, new_char: str):
@@ -134,13 +128,13 @@ def read_vault():
         robot_3 = Point(player.x - 1, player.y + 1)
         robot_4 = Point(player.x + 1, player.y + 1)
 
-        remaining_keys = 0
+        all_keys = 0
 
         for i in plan:
             if i >= 'a' and i <= 'z':
-                remaining_keys += 1
+                all_keys |= 1 << (ord(i) - ord('a'))
 
-        return Vault(plan, width, height, (robot_1, robot_2, robot_3, robot_4), remaining_keys)
+        return Vault(plan, width, height, (robot_1, robot_2, robot_3, robot_4), all_keys)
 
 if __name__ == '__main__':
     main()
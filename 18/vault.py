@@ -0,0 +1,224 @@
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+from collections import deque
+import heapq
+import os
+import sys
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from State import StatePacker
+
+WALL = '#'
+ENTRANCE = '@'
+
+# Key nodes are numbered by their letter, so a node's bit in a keyset is
+# 1 << node. Robots are numbered after the last possible key.
+ROBOT_NODES = 26
+
+# Target node, steps, doors on the way
+Edge = Tuple[int, int, int]
+# Target key, steps, doors on the way, other keys on the way
+Path = Tuple[int, int, int, int]
+
+class Vault(NamedTuple):
+    plan: str
+    width: int
+    height: int
+    all_keys: int
+
+def read_vault(path: str) -> Vault:
+    with open(path) as file:
+        plan_list = [line.strip() for line in file if line.strip()]
+
+    width = len(plan_list[0])
+    plan = ''.join(plan_list)
+    all_keys = 0
+    for cell in plan:
+        if is_key(cell):
+            all_keys |= key_bit(cell)
+
+    return Vault(plan, width, len(plan_list), all_keys)
+
+def split_vault(vault: Vault) -> Vault:
+    """The vault with its single entrance replaced by four, one in each
+    quadrant, and the cells between them walled off."""
+    plan = list(vault.plan)
+    entrance = vault.plan.index(ENTRANCE)
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            plan[entrance + dy * vault.width + dx] = ENTRANCE if dx and dy else WALL
+
+    return vault._replace(plan=''.join(plan))
+
+def is_key(cell: str) -> bool:
+    return 'a' <= cell <= 'z'
+
+def is_door(cell: str) -> bool:
+    return 'A' <= cell <= 'Z'
+
+def key_bit(cell: str) -> int:
+    """The keyset bit for a key, or for the key that opens a door."""
+    return 1 << (ord(cell.lower()) - ord('a'))
+
+def find_nodes(vault: Vault) -> Tuple[Dict[int, int], List[int]]:
+    """Plan index of every key and entrance node, and the entrance nodes."""
+    positions: Dict[int, int] = {}
+    robots: List[int] = []
+    for index, cell in enumerate(vault.plan):
+        if is_key(cell):
+            positions[ord(cell) - ord('a')] = index
+        elif cell == ENTRANCE:
+            node = ROBOT_NODES + len(robots)
+            robots.append(node)
+            positions[node] = index
+    return positions, robots
+
+class KeyGraph:
+    """A vault compressed into a weighted graph between its keys and robot
+    entrances.
+
+    An edge joins two nodes with a path between them that passes no other
+    key, and carries the path's length and a bitmask of the doors on it.
+    Where there is more than one such path, which the puzzle's vaults only
+    have in open rooms without doors, the shortest is kept.
+    """
+    def __init__(self, vault: Vault):
+        self.vault = vault
+        self.positions, self.robots = find_nodes(vault)
+        self.edges: Dict[int, List[Edge]] = {node: self.find_edges(index) for node, index in self.positions.items()}
+        self.reachable_cache: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+
+    def find_edges(self, start: int) -> List[Edge]:
+        plan, width = self.vault.plan, self.vault.width
+        edges: List[Edge] = []
+        seen = {start}
+        queue = deque([(start, 0, 0)])
+
+        while queue:
+            index, steps, doors = queue.popleft()
+            for neighbour in (index - 1, index + 1, index - width, index + width):
+                if neighbour in seen or not 0 <= neighbour < len(plan):
+                    continue
+                seen.add(neighbour)
+
+                cell = plan[neighbour]
+                if cell == WALL:
+                    continue
+                if is_key(cell):
+                    edges.append((ord(cell) - ord('a'), steps + 1, doors))
+                    continue
+                queue.append((neighbour, steps + 1, doors | key_bit(cell) if is_door(cell) else doors))
+
+        return edges
+
+    def reachable_keys(self, node: int, keys: int) -> List[Tuple[int, int]]:
+        """The keys not in keys that a robot on node can walk to next, and
+        the steps to each, passing only doors that keys open."""
+        cached = self.reachable_cache.get((node, keys))
+        if cached is not None:
+            return cached
+
+        reachable: List[Tuple[int, int]] = []
+        distances = {node: 0}
+        queue = [(0, node)]
+        while queue:
+            steps, current = heapq.heappop(queue)
+            if steps > distances[current]:
+                continue
+            if current != node and current < ROBOT_NODES and not keys & (1 << current):
+                # Picking up a new key ends the move
+                reachable.append((current, steps))
+                continue
+
+            for target, length, doors in self.edges[current]:
+                if doors & ~keys:
+                    continue
+                if steps + length < distances.get(target, steps + length + 1):
+                    distances[target] = steps + length
+                    heapq.heappush(queue, (steps + length, target))
+
+        self.reachable_cache[(node, keys)] = reachable
+        return reachable
+
+def collect_keys(graph: KeyGraph) -> int:
+    """Fewest steps for the robots between them to collect every key.
+
+    Dijkstra over (robot nodes, keyset), where each move takes one robot to
+    a key it doesn't have yet. Robots only ever stand on their entrance or
+    the last key they picked up, so the states are bounded by the keysets
+    that can be reached. States are packed into ints, each robot's node
+    followed by the keyset.
+    """
+    all_keys = graph.vault.all_keys
+    packer = StatePacker(*[ROBOT_NODES + len(graph.robots)] * len(graph.robots), all_keys + 1)
+    robot_shifts = packer.shifts[:-1]
+    node_mask = packer.masks[0]
+    keys_shift = packer.shifts[-1]
+
+    start = packer.pack(*graph.robots, 0)
+    distances: Dict[int, int] = {start: 0}
+    queue = [(0, start)]
+
+    while queue:
+        steps, state = heapq.heappop(queue)
+        if steps > distances[state]:
+            continue
+        keys = state >> keys_shift
+        if keys == all_keys:
+            return steps
+
+        for shift in robot_shifts:
+            node = (state >> shift) & node_mask
+            for key, length in graph.reachable_keys(node, keys):
+                next_state = state ^ (node ^ key) << shift | 1 << (key + keys_shift)
+                if steps + length < distances.get(next_state, steps + length + 1):
+                    distances[next_state] = steps + length
+                    heapq.heappush(queue, (steps + length, next_state))
+
+    raise RuntimeError('Could not collect every key')
+
+class PathTable:
+    """Shortest paths from every key and entrance to every key, found with
+    one BFS from each.
+
+    Each path records the doors and the other keys on it, so a search can
+    tell whether a move is open to it with bitmask checks alone. A move
+    through a key not yet collected is never needed, since stopping for
+    that key first costs nothing extra.
+    """
+    def __init__(self, vault: Vault):
+        self.vault = vault
+        self.positions, self.robots = find_nodes(vault)
+        self.paths: Dict[int, List[Path]] = {node: self.find_paths(index) for node, index in self.positions.items()}
+
+    def find_paths(self, start: int) -> List[Path]:
+        plan, width = self.vault.plan, self.vault.width
+        paths: List[Path] = []
+        seen = {start}
+        queue = deque([(start, 0, 0, 0)])
+
+        while queue:
+            index, steps, doors, keys = queue.popleft()
+            for neighbour in (index - 1, index + 1, index - width, index + width):
+                if neighbour in seen or not 0 <= neighbour < len(plan):
+                    continue
+                seen.add(neighbour)
+
+                cell = plan[neighbour]
+                if cell == WALL:
+                    continue
+                if is_key(cell):
+                    paths.append((ord(cell) - ord('a'), steps + 1, doors, keys))
+                    queue.append((neighbour, steps + 1, doors, keys | key_bit(cell)))
+                elif is_door(cell):
+                    queue.append((neighbour, steps + 1, doors | key_bit(cell), keys))
+                else:
+                    queue.append((neighbour, steps + 1, doors, keys))
+
+        return paths
+
+    def moves(self, node: int, keys: int) -> Iterator[Tuple[int, int]]:
+        """The keys not in keys that can be walked to from node, and the
+        steps to each."""
+        for target, steps, doors, on_path in self.paths[node]:
+            if not (keys >> target) & 1 and not (doors | on_path) & ~keys:
+                yield target, steps
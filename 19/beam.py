@@ -0,0 +1,193 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import math
+import os
+import sys
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from Intcode import BatchRunner, Computer, Program, init_batch_worker, run_batch_chunk
+
+Point = Tuple[int, int]
+# First and last x in the beam on a row
+Edges = Tuple[int, int]
+
+# Row the beam's slopes are measured on, to guess where other rows are
+REFERENCE_ROW = 50
+# Edges are whole numbers, so whether a square fits is only nearly
+# monotonic in its bottom row; this many rows above the binary search
+# result are checked as well
+SQUARE_SLACK = 10
+
+def in_beam(computer: Computer) -> bool:
+    return computer.get_output() == 1
+
+class BeamMap:
+    """Answers questions about the tractor beam while probing as few points
+    as possible.
+
+    Probe results are cached by (x, y). Uncached points are evaluated in
+    batches, spread across a process pool when processes is more than one,
+    and searches probe several points per round to keep the pool busy.
+
+    The beam is assumed to be a cone from the origin: each row holds one
+    contiguous run of points and both edges move away from the origin as
+    the rows go down.
+    """
+    def __init__(self, program: Program, processes: Optional[int]=None):
+        self.cache: Dict[Point, bool] = {}
+        self.edges: Dict[int, Optional[Edges]] = {}
+        self.slopes: Optional[Tuple[float, float]] = None
+        self.probes = 0
+
+        self.processes = processes if processes and processes > 1 else 1
+        # Points probed per round of a search
+        self.fan_out = max(1, self.processes * 2 - 1)
+
+        self.runner: Optional[BatchRunner] = None
+        self.executor: Optional[ProcessPoolExecutor] = None
+        if self.processes > 1:
+            self.executor = ProcessPoolExecutor(self.processes, initializer=init_batch_worker, initargs=(program,))
+        else:
+            self.runner = BatchRunner(program)
+
+    def __enter__(self) -> 'BeamMap':
+        return self
+
+    def __exit__(self, *_):
+        if self.executor:
+            self.executor.shutdown()
+
+    def probe_many(self, points: Iterable[Point]) -> List[bool]:
+        points = list(points)
+        missing = list(dict.fromkeys(point for point in points if point not in self.cache))
+        self.probes += len(missing)
+
+        if self.executor:
+            jobs = [([x, y], None) for x, y in missing]
+            chunk_size = math.ceil(len(jobs) / self.processes) or 1
+            chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+            results: List[bool] = []
+            for chunk_results in self.executor.map(run_batch_chunk, chunks, repeat(in_beam)):
+                results.extend(chunk_results)
+        else:
+            assert self.runner
+            results = [in_beam(self.runner.run([x, y])) for x, y in missing]
+
+        self.cache.update(zip(missing, results))
+        return [self.cache[point] for point in points]
+
+    def probe(self, x: int, y: int) -> bool:
+        return self.probe_many([(x, y)])[0]
+
+    def first_where(self, y: int, low: int, high: int, value: bool) -> int:
+        """Smallest x in [low, high] on row y whose probe gives value, where
+        high's does and the probes change only once in the range."""
+        while low < high:
+            # Split the range into count + 1 parts
+            count = min(self.fan_out, high - low)
+            xs = sorted({low + (high - low) * i // (count + 1) for i in range(1, count + 1)})
+            results = self.probe_many((x, y) for x in xs)
+
+            for i, result in enumerate(results):
+                if result == value:
+                    high = xs[i]
+                    if i > 0:
+                        low = xs[i - 1] + 1
+                    break
+            else:
+                low = xs[-1] + 1
+        return low
+
+    def bracket(self, y: int, inside: int, direction: int) -> int:
+        """A point outside the beam on row y, beyond the edge on the given
+        side of inside, found by probing at doubling distances."""
+        distance = 1
+        while True:
+            xs = [inside + direction * (distance << i) for i in range(self.fan_out)]
+            xs = [x for x in xs if x >= 0]
+            for x, result in zip(xs, self.probe_many((x, y) for x in xs)):
+                if not result:
+                    return x
+            if len(xs) < self.fan_out:
+                # Went past the start of the row
+                return -1
+            distance <<= self.fan_out
+
+    def point_in_row(self, y: int) -> Optional[int]:
+        if self.slopes:
+            left_slope, right_slope = self.slopes
+            guess = round(y * (left_slope + right_slope) / 2)
+            if self.probe(guess, y):
+                return guess
+            xs = range(max(0, math.floor(y * left_slope) - 2), math.ceil(y * right_slope) + 3)
+        else:
+            xs = range(0, 10 * max(y, 1) + 1)
+
+        for start in range(0, len(xs), max(self.fan_out, REFERENCE_ROW)):
+            chunk = xs[start:start + max(self.fan_out, REFERENCE_ROW)]
+            for x, result in zip(chunk, self.probe_many((x, y) for x in chunk)):
+                if result:
+                    return x
+        return None
+
+    def row_edges(self, y: int) -> Optional[Edges]:
+        """First and last x in the beam on row y, or None if it misses the
+        row."""
+        if y in self.edges:
+            return self.edges[y]
+
+        if self.slopes is None and y != REFERENCE_ROW:
+            reference = self.row_edges(REFERENCE_ROW)
+            assert reference, 'No beam on the reference row'
+            self.slopes = (reference[0] / REFERENCE_ROW, reference[1] / REFERENCE_ROW)
+
+        inside = self.point_in_row(y)
+        if inside is None:
+            self.edges[y] = None
+            return None
+
+        left = self.first_where(y, self.bracket(y, inside, -1) + 1, inside, True)
+        right = self.first_where(y, inside + 1, self.bracket(y, inside, 1), False) - 1
+        self.edges[y] = (left, right)
+        return left, right
+
+    def square_fits(self, size: int, bottom: int) -> Optional[Point]:
+        """Top left corner of a size x size square in the beam with its
+        bottom left corner on the left edge of row bottom, if there is one."""
+        top = bottom - size + 1
+        if top < 0:
+            return None
+        bottom_edges = self.row_edges(bottom)
+        top_edges = self.row_edges(top)
+        if not bottom_edges or not top_edges:
+            return None
+
+        left = bottom_edges[0]
+        if top_edges[0] <= left and top_edges[1] - left + 1 >= size:
+            return left, top
+        return None
+
+    def find_square(self, size: int) -> Point:
+        """Top left corner of the size x size square closest to the origin.
+
+        Searches for the first bottom row the square fits on, doubling from
+        the first possible row and then binary searching.
+        """
+        low = size - 1
+        high = size
+        while not self.square_fits(size, high):
+            low, high = high, high * 2
+
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.square_fits(size, middle):
+                high = middle
+            else:
+                low = middle
+
+        for bottom in range(max(size - 1, high - SQUARE_SLACK), high + 1):
+            corner = self.square_fits(size, bottom)
+            if corner:
+                return corner
+        raise RuntimeError('Did not find square')
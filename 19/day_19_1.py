@@ -1,31 +1,33 @@
 #!/usr/bin/env python3
+import argparse
 import os
 import sys
-from dataclasses import dataclass
 
 sys.path.insert(1, os.path.join(sys.path[0], '..'))
-from Intcode import Program, Computer, read_program
-
-@dataclass
-class Point:
-    x: int
-    y: int
+from Intcode import read_program
+from beam import BeamMap
 
 def main():
-    program = read_program()
+    parser = argparse.ArgumentParser(description='Count the points affected by the tractor beam')
+    parser.add_argument('--size', type=int, default=50)
+    parser.add_argument('--processes', type=int, default=1)
+    args = parser.parse_args()
+
+    with BeamMap(read_program(), args.processes) as beam:
+        points = [(x, y) for y in range(args.size) for x in range(args.size)]
+        affected = beam.probe_many(points)
 
     count_points = 0
     output = ''
 
-    for y in range(50):
-        for x in range(50):
-            is_affected = test_beam_at(program, Point(x, y))
+    for y in range(args.size):
+        for x in range(args.size):
+            is_affected = affected[y * args.size + x]
 
             if is_affected:
                 output += '#'
                 count_points += 1
             else:
-
                 output += '.'
 
         output += '\n'
@@ -34,11 +36,5 @@ def main():
     print('Affected points:', count_points)
 
 
-def test_beam_at(program: Program, point: Point):
-    computer = Computer(program, log_output=False)
-    computer.run([point.x, point.y])
-    return computer.get_output() == 1
-
-
 if __name__ == '__main__':
     main()
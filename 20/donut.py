@@ -0,0 +1,202 @@
+from collections import defaultdict, deque
+from typing import DefaultDict, Dict, List, NamedTuple, Optional, Tuple
+import heapq
+import os
+import re
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from Grid import DenseGrid
+from State import StatePacker
+
+PASSAGE = ord('.')
+LETTER = re.compile(rb'[A-Z]')
+
+class Point(NamedTuple):
+    x: int
+    y: int
+
+class Donut(NamedTuple):
+    passages: DenseGrid
+    portals: Dict[Point, Point]
+    start: Point
+    end: Point
+    max_x: int
+    max_y: int
+
+def is_outer_portal(donut: Donut, pos: Point):
+    if pos.x == 2: return True
+    if pos.y == 2: return True
+    if pos.x == donut.max_x: return True
+    if pos.y == donut.max_y: return True
+
+    return False
+
+class PortalGraph:
+    """A donut compressed into a weighted graph between the start, the end
+    and the portal endpoints.
+
+    Walking edges join nodes connected through the passages without using
+    a portal, weighted by the steps between them. Every portal endpoint is
+    tagged outer or inner: stepping through an outer one goes up a level
+    and through an inner one goes down, one step either way.
+    """
+    def __init__(self, donut: Donut):
+        passages = donut.passages
+        self.donut = donut
+
+        points = [donut.start, donut.end] + list(donut.portals)
+        self.nodes: Dict[int, int] = {passages.index(*point): node for node, point in enumerate(points)}
+        self.start, self.end = 0, 1
+        self.partners: Dict[int, int] = {
+            self.nodes[passages.index(*a)]: self.nodes[passages.index(*b)] for a, b in donut.portals.items()
+        }
+        self.outer: List[bool] = [is_outer_portal(donut, point) for point in points]
+        self.edges: List[List[Tuple[int, int]]] = [self.walk(passages.index(*point)) for point in points]
+
+    def walk(self, start: int) -> List[Tuple[int, int]]:
+        """Other nodes reachable from start through the passages alone, with
+        the steps to each."""
+        cells, width = self.donut.passages.cells, self.donut.passages.width
+        edges: List[Tuple[int, int]] = []
+        seen = {start}
+        queue = deque([(start, 0)])
+
+        while queue:
+            index, steps = queue.popleft()
+            if index != start and index in self.nodes:
+                edges.append((self.nodes[index], steps))
+            for neighbour in (index - 1, index + 1, index - width, index + width):
+                if cells[neighbour] == PASSAGE and neighbour not in seen:
+                    seen.add(neighbour)
+                    queue.append((neighbour, steps + 1))
+
+        return edges
+
+    def shortest_path(self, recursive: bool=True, max_level: Optional[int]=None) -> Optional[int]:
+        """Fewest steps from the start to the end on the outermost level, or
+        None if there is no way through.
+
+        Dijkstra over (node, level). Levels deeper than max_level are not
+        explored. By default that is the number of portals, which is deeper
+        than the shortest way through goes in practice.
+        """
+        if max_level is None:
+            max_level = len(self.partners) // 2
+
+        # States pack the node with the level above it
+        packer = StatePacker(len(self.edges), None)
+        level_shift = packer.shifts[1]
+        node_mask = packer.masks[0]
+        end = packer.pack(self.end, 0)
+
+        start = packer.pack(self.start, 0)
+        distances: Dict[int, int] = {start: 0}
+        queue = [(0, start)]
+
+        while queue:
+            steps, state = heapq.heappop(queue)
+            if steps > distances[state]:
+                continue
+            if state == end:
+                return steps
+
+            node = state & node_mask
+            level = state >> level_shift
+            moves = [(state - node + target, length) for target, length in self.edges[node]]
+
+            partner = self.partners.get(node)
+            if partner is not None:
+                next_level = level
+                if recursive:
+                    next_level += -1 if self.outer[node] else 1
+                if 0 <= next_level <= max_level:
+                    moves.append((partner | next_level << level_shift, 1))
+
+            for next_state, length in moves:
+                if steps + length < distances.get(next_state, steps + length + 1):
+                    distances[next_state] = steps + length
+                    heapq.heappush(queue, (steps + length, next_state))
+
+        return None
+
+def find_labels(passages: DenseGrid) -> List[Tuple[str, int]]:
+    """Every portal label in the plan, with the index of the passage cell
+    next to it."""
+    if np is not None:
+        return find_labels_numpy(passages)
+
+    cells, width = passages.cells, passages.width
+    labels: List[Tuple[str, int]] = []
+
+    # Read from each label's first letter, left or top
+    for match in LETTER.finditer(cells):
+        i = match.start()
+        column = i % width
+        for step, fits in ((1, column + 1 < width), (width, i + width < len(cells))):
+            if not fits or not is_letter(cells[i + step]):
+                continue
+            label = chr(cells[i]) + chr(cells[i + step])
+            after, before = i + 2 * step, i - step
+            if (step == width or column + 2 < width) and after < len(cells) and cells[after] == PASSAGE:
+                labels.append((label, after))
+            elif (step == width or column > 0) and before >= 0 and cells[before] == PASSAGE:
+                labels.append((label, before))
+
+    return labels
+
+def find_labels_numpy(passages: DenseGrid) -> List[Tuple[str, int]]:
+    width = passages.width
+    cells = np.frombuffer(bytes(passages.cells), dtype=np.uint8).reshape(passages.height, width)
+    letters = (cells >= ord('A')) & (cells <= ord('Z'))
+    open_cells = cells == PASSAGE
+
+    # Each mask marks the top left of a label with the passage on one side,
+    # giving the offsets of the first letter, the second and the passage
+    matches = [
+        (letters[:, :-2] & letters[:, 1:-1] & open_cells[:, 2:], 0, 1, 2),
+        (open_cells[:, :-2] & letters[:, 1:-1] & letters[:, 2:], 1, 2, 0),
+        (letters[:-2] & letters[1:-1] & open_cells[2:], 0, width, 2 * width),
+        (open_cells[:-2] & letters[1:-1] & letters[2:], width, 2 * width, 0),
+    ]
+
+    flat = passages.cells
+    labels: List[Tuple[str, int]] = []
+    for mask, first, second, passage in matches:
+        ys, xs = np.nonzero(mask)
+        for i in (ys * width + xs).tolist():
+            labels.append((chr(flat[i + first]) + chr(flat[i + second]), i + passage))
+    return labels
+
+def is_letter(cell: int) -> bool:
+    return ord('A') <= cell <= ord('Z')
+
+def read_donut(path: str='input.txt') -> Donut:
+    with open(path) as file:
+        passages = DenseGrid.from_text(file)
+
+    portal_ids: DefaultDict[str, List[Point]] = defaultdict(list)
+    for label, index in find_labels(passages):
+        portal_ids[label].append(Point(*passages.point(index)))
+
+    start = portal_ids['AA'][0]
+    end = portal_ids['ZZ'][0]
+
+    portals: Dict[Point, Point] = {}
+
+    for this_portals in portal_ids.values():
+        if len(this_portals) != 2: continue
+
+        portals[this_portals[0]] = this_portals[1]
+        portals[this_portals[1]] = this_portals[0]
+
+    bounds = passages.bounds([PASSAGE])
+    assert bounds
+    _, _, max_x, max_y = bounds
+
+    return Donut(passages, portals, start, end, max_x, max_y)
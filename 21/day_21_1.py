@@ -6,11 +6,12 @@ import sys
 os.system('clear')
 
 sys.path.insert(1, os.path.join(sys.path[0], '..'))
-from Intcode import Computer, read_program
+from Intcode import AsciiChannel, Computer, read_program
 
 def main():
     program = read_program()
     computer = Computer(program, log_output=False)
+    computer.outputs = AsciiChannel()
     computer.run()
     print(computer.get_ascii_output())
 
@@ -3,53 +3,17 @@ import os
 import sys
 
 sys.path.insert(1, os.path.join(sys.path[0], '..'))
-from Intcode import Computer, read_program
-from typing import List, NamedTuple
-
-class Packet(NamedTuple):
-    x: int
-    y: int
-
-COMPUTER_COUNT = 50
+from Intcode import read_program
+from network import EventType, Network
 
 def main():
     program = read_program()
+    network = Network(program)
 
-    computers: List[Computer] = []
-    packet_queues: List[List[Packet]] = []
-
-    for i in range(COMPUTER_COUNT):
-        computer = Computer(program, log_output=False)
-        computers.append(computer)
-        packet_queues.append([])
-        computer.run([i])
-
-    while True:
-        for i in range(COMPUTER_COUNT):
-            computer = computers[i]
-            packet_queue = packet_queues[i]
-
-            output = computer.get_all_output()
-
-            while output:
-                address = output.pop(0)
-                x = output.pop(0)
-                y = output.pop(0)
-
-                # print(f'Computer {i} is sending packet ({x},{y}) to address {address}')
-
-                if address == 255:
-                    print('Y value of packet to address 255:', y)
-                    return
-
-                packet_queues[address].append(Packet(x, y))
-
-            if not packet_queue:
-                computer.run([-1])
-            else:
-                packet = packet_queue.pop(0)
-                computer.run([packet.x, packet.y])
-
+    for event in network.run():
+        if event.type == EventType.NAT_RECEIVED:
+            print('Y value of packet to address 255:', event.packet.y)
+            return
 
 
 if __name__ == '__main__':
@@ -0,0 +1,146 @@
+from typing import Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from collections import deque
+from enum import Enum
+import os
+import sys
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from Intcode import Computer, Program, QueueChannel, read_program
+
+COMPUTER_COUNT = 50
+NAT_ADDRESS = 255
+
+class Packet(NamedTuple):
+    x: int
+    y: int
+
+class EventType(Enum):
+    NAT_RECEIVED = 'received'
+    NAT_SENT = 'sent'
+
+class Event(NamedTuple):
+    type: EventType
+    packet: Packet
+    # Group of COMPUTER_COUNT machines whose NAT the packet is for
+    group: int = 0
+
+# Takes an address and the packet's x and y
+Send = Callable[[int, int, int], None]
+
+def run_nic(computer: Computer, address: int, send: Send, send_to_nat: Send) -> bool:
+    """Run the NIC at address once, with -1 if no packet is waiting for it,
+    and route what it sends.
+
+    Addresses are local to the machine's group of COMPUTER_COUNT, so
+    packets go to send with the address made absolute, and packets for the
+    NAT go to send_to_nat with the group in place of the address. Returns
+    whether the machine should stay scheduled: a machine that read -1 and
+    sent nothing is idle.
+    """
+    queue = computer.inputs
+    received = len(queue) > 0
+    computer.run([] if received else [-1])
+    output = computer.get_all_output()
+    group = address // COMPUTER_COUNT
+
+    for i in range(0, len(output), 3):
+        destination, x, y = output[i:i + 3]
+        if destination == NAT_ADDRESS:
+            send_to_nat(group, x, y)
+        else:
+            send(group * COMPUTER_COUNT + destination, x, y)
+
+    return bool(output or received or len(queue)) and not computer.halted
+
+class Network:
+    """Event-driven scheduler for a network of Intcode NICs.
+
+    A machine is only run when it has been sent a packet, or to give it a
+    single -1 after it last did something. A machine that reads -1 and goes
+    back to waiting for input without sending anything is idle, and stays
+    unscheduled until a packet arrives for it, so the network is idle
+    exactly when nothing is scheduled.
+
+    Networks larger than COMPUTER_COUNT are built from independent groups of
+    COMPUTER_COUNT machines, each booted with addresses 0 to 49 and routing
+    within its group. Each group has its own NAT, which wakes the group's
+    address 0 once the whole network is idle. Events carry their group.
+    """
+    def __init__(self, program: Program, size: int=COMPUTER_COUNT):
+        self.computers: List[Computer] = []
+        # Packets are queued straight onto each machine's input channel
+        self.queues: List[QueueChannel] = []
+        self.scheduled = [True] * size
+        self.ready: Deque[int] = deque(range(size))
+        self.groups = -(-size // COMPUTER_COUNT)
+        self.nat_inbox: Deque[Tuple[int, Packet]] = deque()
+        self.packets_sent = 0
+
+        for address in range(size):
+            computer = Computer(program, log_output=False)
+            computer.run([address % COMPUTER_COUNT])
+            self.computers.append(computer)
+            assert isinstance(computer.inputs, QueueChannel)
+            self.queues.append(computer.inputs)
+
+    def send(self, address: int, x: int, y: int):
+        self.packets_sent += 1
+        self.queues[address].extend((x, y))
+        if not self.scheduled[address]:
+            self.scheduled[address] = True
+            self.ready.append(address)
+
+    def send_to_nat(self, group: int, x: int, y: int):
+        self.nat_inbox.append((group, Packet(x, y)))
+
+    def run(self) -> Iterator[Event]:
+        """Run the network, yielding every packet the NATs receive or send."""
+        nat_packets: Dict[int, Packet] = {}
+
+        while True:
+            while self.ready:
+                address = self.ready.popleft()
+                if run_nic(self.computers[address], address, self.send, self.send_to_nat):
+                    self.ready.append(address)
+                else:
+                    self.scheduled[address] = False
+
+                while self.nat_inbox:
+                    group, packet = self.nat_inbox.popleft()
+                    nat_packets[group] = packet
+                    yield Event(EventType.NAT_RECEIVED, packet, group)
+
+            if not nat_packets:
+                return
+
+            for group, packet in sorted(nat_packets.items()):
+                yield Event(EventType.NAT_SENT, packet, group)
+                self.send(group * COMPUTER_COUNT, *packet)
+
+def main():
+    program = read_program()
+
+    for size in (50, 500, 5000):
+        start = time.perf_counter()
+        network = Network(program, size)
+        boot_time = time.perf_counter() - start
+
+        # Every group runs the same program, so stop when group 0 is done
+        last_nat_y: Optional[int] = None
+        for event in network.run():
+            if event.type == EventType.NAT_SENT and event.group == 0:
+                if last_nat_y == event.packet.y:
+                    break
+                last_nat_y = event.packet.y
+
+        seconds = time.perf_counter() - start
+        run_time = seconds - boot_time
+        print(
+            f'{size:5} nodes: {seconds:7.3f}s ({boot_time:.3f}s boot), '
+            f'{network.packets_sent} packets ({network.packets_sent // network.groups} per group), '
+            f'{network.packets_sent / run_time:,.0f} packets/s after boot'
+        )
+
+if __name__ == '__main__':
+    main()
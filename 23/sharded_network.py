@@ -0,0 +1,315 @@
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+from collections import deque
+from multiprocessing import Array, Process, Value
+from multiprocessing import shared_memory
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from Intcode import Computer, Program, QueueChannel, read_program
+from network import COMPUTER_COUNT, Event, EventType, Packet, run_nic
+
+# Destination address, or group for packets to the coordinator's NATs, x, y
+Record = Tuple[int, int, int]
+
+RING_CAPACITY = 4096
+
+# Per participant fields in the shared status array
+IDLE, SENT, RECEIVED = range(3)
+STATUS_FIELDS = 3
+
+class RingBuffer:
+    """Single-producer single-consumer queue of records in shared memory.
+
+    The first two slots hold the number of records read and written so far.
+    The producer writes a record before bumping the write count and the
+    consumer reads records before bumping the read count, so each side only
+    ever writes its own counter.
+    """
+    def __init__(self, capacity: int=RING_CAPACITY, name: Optional[str]=None):
+        self.capacity = capacity
+        size = (2 + capacity * 3) * 8
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        assert self.shm.buf is not None
+        self.slots = self.shm.buf.cast('q')
+        if name is None:
+            self.slots[0] = self.slots[1] = 0
+
+    def __reduce__(self):
+        return (RingBuffer, (self.capacity, self.shm.name))
+
+    def put(self, record: Record) -> bool:
+        slots = self.slots
+        written = slots[1]
+        if written - slots[0] >= self.capacity:
+            return False
+        offset = 2 + (written % self.capacity) * 3
+        slots[offset], slots[offset + 1], slots[offset + 2] = record
+        slots[1] = written + 1
+        return True
+
+    def get_all(self) -> List[Record]:
+        slots = self.slots
+        read, written = slots[0], slots[1]
+        records: List[Record] = []
+        for i in range(read, written):
+            offset = 2 + (i % self.capacity) * 3
+            records.append((slots[offset], slots[offset + 1], slots[offset + 2]))
+        slots[0] = written
+        return records
+
+    def close(self):
+        self.slots.release()
+        self.shm.close()
+
+    def unlink(self):
+        self.close()
+        self.shm.unlink()
+
+def owner(bounds: List[int], address: int) -> int:
+    """The shard holding address."""
+    for shard in range(len(bounds) - 1):
+        if address < bounds[shard + 1]:
+            return shard
+    raise ValueError(f'No shard for address {address}')
+
+class Shard:
+    """The machines with addresses start..end-1, run in a worker process.
+
+    Scheduling within a shard follows Network, stepping machines with
+    run_nic. Packets for other shards and the NATs go out through ring
+    buffers; whenever the shard runs out of work it publishes its idle flag
+    with its sent/received counts, which lets the coordinator detect global
+    idleness exactly.
+    """
+    def __init__(self, index: int, bounds: List[int], rings: List[List[Optional[RingBuffer]]], status, stop):
+        self.index = index
+        self.bounds = bounds
+        self.start = bounds[index]
+        self.end = bounds[index + 1]
+        self.coordinator = len(bounds) - 1
+        self.inbound = [ring for ring in (row[index] for row in rings) if ring]
+        self.outbound = rings[index]
+        self.outboxes: Dict[int, Deque[Record]] = {}
+        self.status = status
+        self.stop = stop
+        self.sent = 0
+        self.received = 0
+
+        count = self.end - self.start
+        self.computers: List[Computer] = []
+        self.queues: List[QueueChannel] = []
+        self.scheduled = [True] * count
+        self.ready: Deque[int] = deque(range(count))
+
+    def boot(self, program: Program):
+        for address in range(self.start, self.end):
+            computer = Computer(program, log_output=False)
+            computer.run([address % COMPUTER_COUNT])
+            self.computers.append(computer)
+            assert isinstance(computer.inputs, QueueChannel)
+            self.queues.append(computer.inputs)
+
+    def deliver(self, address: int, x: int, y: int):
+        local = address - self.start
+        self.queues[local].extend((x, y))
+        if not self.scheduled[local]:
+            self.scheduled[local] = True
+            self.ready.append(local)
+
+    def send(self, address: int, x: int, y: int):
+        if self.start <= address < self.end:
+            self.deliver(address, x, y)
+        else:
+            self.outboxes.setdefault(owner(self.bounds, address), deque()).append((address, x, y))
+
+    def send_to_nat(self, group: int, x: int, y: int):
+        self.outboxes.setdefault(self.coordinator, deque()).append((group, x, y))
+
+    def flush(self):
+        for participant, outbox in self.outboxes.items():
+            ring = self.outbound[participant]
+            assert ring
+            while outbox and ring.put(outbox[0]):
+                outbox.popleft()
+                self.sent += 1
+
+    def receive(self) -> bool:
+        received = False
+        for ring in self.inbound:
+            for record in ring.get_all():
+                self.received += 1
+                received = True
+                self.deliver(*record)
+        return received
+
+    def run_ready(self):
+        while self.ready:
+            local = self.ready.popleft()
+            if run_nic(self.computers[local], self.start + local, self.send, self.send_to_nat):
+                self.ready.append(local)
+            else:
+                self.scheduled[local] = False
+
+    def set_idle(self, idle: bool):
+        offset = self.index * STATUS_FIELDS
+        with self.status.get_lock():
+            self.status[offset + IDLE] = idle
+            self.status[offset + SENT] = self.sent
+            self.status[offset + RECEIVED] = self.received
+
+    def run(self):
+        published = (False, 0, 0)
+        while not self.stop.value:
+            self.receive()
+            self.run_ready()
+            self.flush()
+
+            # run_ready drains the ready queue, so only a full ring can
+            # leave work behind
+            idle = not any(self.outboxes.values())
+            state = (idle, self.sent, self.received)
+            if state != published:
+                self.set_idle(idle)
+                published = state
+            elif idle:
+                time.sleep(0.0001)
+
+def run_shard(index: int, program: Program, bounds: List[int], rings, status, stop):
+    shard = Shard(index, bounds, rings, status, stop)
+    shard.boot(program)
+    shard.run()
+
+    for row in rings:
+        for ring in row:
+            if ring:
+                ring.close()
+
+class ShardedNetwork:
+    """Network split across worker processes, with the NAT in this one.
+
+    Produces the same events as Network.run.
+    """
+    def __init__(self, program: Program, size: int=COMPUTER_COUNT, shards: Optional[int]=None):
+        shards = min(shards or os.cpu_count() or 1, size)
+        self.bounds = [size * i // shards for i in range(shards + 1)]
+        self.coordinator = shards
+        participants = shards + 1
+
+        self.rings: List[List[Optional[RingBuffer]]] = [
+            [RingBuffer() if i != j else None for j in range(participants)]
+            for i in range(participants)
+        ]
+        # Shards start out busy booting
+        self.status = Array('q', participants * STATUS_FIELDS)
+        self.stop = Value('b', False)
+        self.sent = 0
+        self.received = 0
+
+        self.processes = [
+            Process(target=run_shard, args=(i, program, self.bounds, self.rings, self.status, self.stop))
+            for i in range(shards)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def check_shards(self):
+        # Shards only exit once told to stop
+        for index, process in enumerate(self.processes):
+            if process.exitcode is not None:
+                raise RuntimeError(f'Shard {index} exited with code {process.exitcode}')
+
+    def is_idle(self) -> bool:
+        self.check_shards()
+        with self.status.get_lock():
+            values = self.status[:]
+
+        sent = self.sent
+        received = self.received
+        for shard in range(self.coordinator):
+            offset = shard * STATUS_FIELDS
+            if not values[offset + IDLE]:
+                return False
+            sent += values[offset + SENT]
+            received += values[offset + RECEIVED]
+
+        return sent == received
+
+    def run(self) -> Iterator[Event]:
+        nat_packets: Dict[int, Packet] = {}
+        inbound = [row[self.coordinator] for row in self.rings[:self.coordinator]]
+
+        try:
+            while True:
+                for ring in inbound:
+                    assert ring
+                    for group, x, y in ring.get_all():
+                        self.received += 1
+                        nat_packets[group] = Packet(x, y)
+                        yield Event(EventType.NAT_RECEIVED, nat_packets[group], group)
+
+                if not self.is_idle():
+                    time.sleep(0.0001)
+                    continue
+
+                if not nat_packets:
+                    return
+
+                for group, packet in sorted(nat_packets.items()):
+                    yield Event(EventType.NAT_SENT, packet, group)
+                    address = group * COMPUTER_COUNT
+                    ring = self.rings[self.coordinator][owner(self.bounds, address)]
+                    assert ring
+                    while not ring.put((address, packet.x, packet.y)):
+                        self.check_shards()
+                        time.sleep(0.0001)
+                    self.sent += 1
+        finally:
+            self.close()
+
+    def close(self):
+        self.stop.value = True
+        for process in self.processes:
+            process.join()
+        for row in self.rings:
+            for ring in row:
+                if ring:
+                    ring.unlink()
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the day 23 network across processes')
+    parser.add_argument('--size', type=int, default=COMPUTER_COUNT)
+    parser.add_argument('--shards', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    program = read_program()
+    start = time.perf_counter()
+    network = ShardedNetwork(program, args.size, args.shards)
+
+    first_y: Optional[int] = None
+    last_nat_y: Optional[int] = None
+
+    # Every group runs the same program, so follow group 0
+    for event in network.run():
+        if event.group != 0:
+            continue
+        if event.type == EventType.NAT_RECEIVED:
+            if first_y is None:
+                first_y = event.packet.y
+            continue
+
+        if last_nat_y == event.packet.y:
+            break
+        last_nat_y = event.packet.y
+
+    print('First Y value of packet to address 255:', first_y)
+    print('Y value sent twice by the NAT:', last_nat_y)
+    print(f'{args.size} nodes in {len(network.processes)} shards: {time.perf_counter() - start:.3f}s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+from operator import add
+import time
+import tracemalloc
+
+Bounds = Tuple[int, int, int, int]
+
+class DenseGrid:
+    """A grid of byte-sized cells stored in one bytearray, row by row.
+
+    Cells can be set at any coordinates, negative ones included: the grid
+    grows by doubling in whichever direction is needed, and reading outside
+    it gives fill. A cell can also be addressed by its integer index into
+    cells, which is what the neighbour helpers work with. Indices stay
+    valid until the grid next grows, so grids built from text, which never
+    grow, can be searched by index alone.
+    """
+    def __init__(self, width: int=0, height: int=0, x_min: int=0, y_min: int=0, fill: int=0):
+        self.width = width
+        self.height = height
+        self.x_min = x_min
+        self.y_min = y_min
+        self.fill = fill
+        self.cells = bytearray([fill]) * (width * height)
+        # Extent of the cells that have been set, as x_min, y_min, x_max, y_max
+        self.extent: Optional[Bounds] = None
+
+    @staticmethod
+    def from_text(lines: Iterable[str], fill: str=' ') -> 'DenseGrid':
+        """A grid holding the characters of lines, padded to the longest
+        line with fill."""
+        rows = [line.rstrip('\n').encode('latin-1') for line in lines]
+        grid = DenseGrid(max((len(row) for row in rows), default=0), len(rows), fill=ord(fill))
+        for y, row in enumerate(rows):
+            start = y * grid.width
+            grid.cells[start:start + len(row)] = row
+        if rows:
+            grid.extent = (0, 0, grid.width - 1, grid.height - 1)
+        return grid
+
+    def index(self, x: int, y: int) -> int:
+        return (y - self.y_min) * self.width + x - self.x_min
+
+    def point(self, index: int) -> Tuple[int, int]:
+        y, x = divmod(index, self.width)
+        return x + self.x_min, y + self.y_min
+
+    def contains(self, x: int, y: int) -> bool:
+        return 0 <= x - self.x_min < self.width and 0 <= y - self.y_min < self.height
+
+    def get(self, x: int, y: int) -> int:
+        if not self.contains(x, y):
+            return self.fill
+        return self.cells[self.index(x, y)]
+
+    def set(self, x: int, y: int, value: int):
+        if not self.contains(x, y):
+            self.grow(x, y)
+        self.cells[self.index(x, y)] = value
+
+        if self.extent is None:
+            self.extent = (x, y, x, y)
+        else:
+            x_min, y_min, x_max, y_max = self.extent
+            if not (x_min <= x <= x_max and y_min <= y <= y_max):
+                self.extent = (min(x_min, x), min(y_min, y), max(x_max, x), max(y_max, y))
+
+    def grow(self, x: int, y: int):
+        """Reallocate so (x, y) is inside, at least doubling the size in
+        each direction that needs it."""
+        width = max(self.width, 1)
+        height = max(self.height, 1)
+        x_min, y_min = self.x_min, self.y_min
+        x_max, y_max = x_min + self.width, y_min + self.height
+
+        if self.width == 0:
+            x_min, x_max = x, x + 1
+        elif x < x_min:
+            x_min = min(x, x_min - width)
+        elif x >= x_max:
+            x_max = max(x + 1, x_max + width)
+        if self.height == 0:
+            y_min, y_max = y, y + 1
+        elif y < y_min:
+            y_min = min(y, y_min - height)
+        elif y >= y_max:
+            y_max = max(y + 1, y_max + height)
+
+        grown = DenseGrid(x_max - x_min, y_max - y_min, x_min, y_min, self.fill)
+        for row in range(self.height):
+            start = grown.index(self.x_min, self.y_min + row)
+            grown.cells[start:start + self.width] = self.cells[row * self.width:(row + 1) * self.width]
+
+        self.width, self.height = grown.width, grown.height
+        self.x_min, self.y_min = grown.x_min, grown.y_min
+        self.cells = grown.cells
+
+    def count(self, value: int) -> int:
+        return self.cells.count(value)
+
+    def find_all(self, value: int) -> Iterator[int]:
+        """Indices of every cell holding value, in order."""
+        index = self.cells.find(value)
+        while index != -1:
+            yield index
+            index = self.cells.find(value, index + 1)
+
+    def mask(self, values: Iterable[int]) -> bytearray:
+        """1 for every cell holding one of values, 0 for the rest."""
+        table = bytearray(256)
+        for value in values:
+            table[value] = 1
+        return self.cells.translate(table)
+
+    def neighbour_counts(self, values: Iterable[int]) -> bytearray:
+        """For every cell, how many of its four neighbours hold one of
+        values.
+
+        Works a row at a time on whole byte strings: the mask is padded with
+        a zero column so that shifting it by one cell never wraps a row.
+        """
+        width, height = self.width, self.height
+        padded_width = width + 1
+        padded = bytearray(padded_width * (height + 2))
+        mask = self.mask(values)
+        for y in range(height):
+            start = (y + 1) * padded_width
+            padded[start:start + width] = mask[y * width:(y + 1) * width]
+
+        offset = padded_width
+        end = offset + padded_width * height
+        counts = map(
+            add,
+            map(add, padded[offset - 1:end - 1], padded[offset + 1:end + 1]),
+            map(add, padded[offset - padded_width:end - padded_width], padded[offset + padded_width:end + padded_width])
+        )
+        padded_counts = bytearray(counts)
+
+        result = bytearray(width * height)
+        for y in range(height):
+            result[y * width:(y + 1) * width] = padded_counts[y * padded_width:y * padded_width + width]
+        return result
+
+    def bounds(self, values: Optional[Iterable[int]]=None) -> Optional[Bounds]:
+        """x_min, y_min, x_max, y_max of the cells holding one of values,
+        or of every cell set if values is None."""
+        if values is None:
+            return self.extent
+
+        mask = self.mask(values)
+        rows = [mask[y * self.width:(y + 1) * self.width] for y in range(self.height)]
+        ys = [y for y, row in enumerate(rows) if 1 in row]
+        if not ys:
+            return None
+
+        x_min = min(rows[y].find(1) for y in ys)
+        x_max = max(rows[y].rfind(1) for y in ys)
+        return x_min + self.x_min, ys[0] + self.y_min, x_max + self.x_min, ys[-1] + self.y_min
+
+    def render(self, chars: Mapping[int, str], bounds: Optional[Bounds]=None, reverse: bool=False) -> str:
+        """The cells within bounds (by default every cell set) as text, one
+        line per row ending in a newline, with reverse putting the highest
+        y first. Values missing from chars are drawn as themselves."""
+        if bounds is None:
+            bounds = self.extent
+        if bounds is None:
+            return ''
+
+        x_min, y_min, x_max, y_max = bounds
+        table: Dict[int, str] = {value: char for value, char in chars.items()}
+        rows = range(y_max, y_min - 1, -1) if reverse else range(y_min, y_max + 1)
+
+        lines: List[str] = []
+        for y in rows:
+            # Only part of the row may lie inside the grid
+            left = max(x_min, self.x_min)
+            right = max(min(x_max + 1, self.x_min + self.width), left)
+            row = bytearray()
+            if self.y_min <= y < self.y_min + self.height:
+                row = self.cells[self.index(left, y):self.index(right, y)]
+            else:
+                right = left
+            line = chr(self.fill) * (left - x_min) + row.decode('latin-1') + chr(self.fill) * (x_max + 1 - right)
+            lines.append(line.translate(table) + '\n')
+        return ''.join(lines)
+
+def build_synthetic(size: int) -> Tuple[Set[Tuple[int, int]], DenseGrid]:
+    # A maze-like pattern with about two thirds of the cells open
+    points: Set[Tuple[int, int]] = set()
+    grid = DenseGrid(fill=ord('#'))
+    for y in range(size):
+        for x in range(size):
+            if (x * 7 + y * 13) % 5 < 3 or x % 4 == 0:
+                points.add((x, y))
+                grid.set(x, y, ord('.'))
+    return points, grid
+
+def traced_size(build: Callable[[], object]) -> int:
+    tracemalloc.start()
+    built = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del built
+    return size
+
+def main():
+    """Compare a set of points with a DenseGrid on large synthetic maps."""
+    for size in (500, 1500):
+        points, grid = build_synthetic(size)
+
+        start = time.perf_counter()
+        copied_points = {(x, y) for x, y in points}
+        build_set = time.perf_counter() - start
+
+        start = time.perf_counter()
+        copied_grid = DenseGrid(fill=grid.fill)
+        for x, y in points:
+            copied_grid.set(x, y, ord('.'))
+        build_grid = time.perf_counter() - start
+        del copied_points, copied_grid
+
+        set_memory = traced_size(lambda: {(x, y) for x, y in points})
+        grid_memory = traced_size(lambda: DenseGrid.from_text(grid.render({}).splitlines()))
+
+        start = time.perf_counter()
+        set_counts = [
+            ((x - 1, y) in points) + ((x + 1, y) in points) + ((x, y - 1) in points) + ((x, y + 1) in points)
+            for y in range(size) for x in range(size)
+        ]
+        count_set = time.perf_counter() - start
+
+        start = time.perf_counter()
+        grid_counts = grid.neighbour_counts([ord('.')])
+        count_grid = time.perf_counter() - start
+        # The grid has grown past the map, so compare the cells inside it
+        assert [grid_counts[grid.index(x, y)] for y in range(size) for x in range(size)] == set_counts
+
+        start = time.perf_counter()
+        text = '\n'.join(''.join('.' if (x, y) in points else '#' for x in range(size)) for y in range(size)) + '\n'
+        render_set = time.perf_counter() - start
+
+        start = time.perf_counter()
+        grid_text = grid.render({})
+        render_grid = time.perf_counter() - start
+        assert grid_text == text
+
+        print(f'{size}x{size}, {len(points):,} open cells')
+        print(f'  memory:           set {set_memory / 2**20:8.1f} MiB  grid {grid_memory / 2**20:8.1f} MiB')
+        print(f'  build:            set {build_set:8.3f}s     grid {build_grid:8.3f}s')
+        print(f'  neighbour counts: set {count_set:8.3f}s     grid {count_grid:8.3f}s')
+        print(f'  render:           set {render_set:8.3f}s     grid {render_grid:8.3f}s')
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,18 @@
-from typing import List, NamedTuple, Dict, Union
+from typing import Any, Callable, Deque, Iterable, Iterator, List, NamedTuple, Dict, Optional, Set, Tuple, TypeVar, Union, overload
+from abc import ABC, abstractmethod
 from enum import IntEnum
-from collections import defaultdict
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat, tee
+import copy
+import math
+import time
+import weakref
 
 Program = List[int]
+Patch = Dict[int, int]
+T = TypeVar('T')
+C = TypeVar('C', bound='Channel')
 
 class OpCode(IntEnum):
     ADD = 1
@@ -39,22 +49,518 @@ class Instruction(NamedTuple):
     inputs: List[int]
     outputs: List[int]
 
-class Computer:
-    def __init__(self, program: Program, log_output: bool=True):
-        self.memory: Dict[int, int] = defaultdict(int)
+# A decoded instruction: a handler specialised for one (opcode, modes) pair
+# plus the arguments it is called with (next instruction pointer followed by
+# the raw parameter values).
+Handler = Callable[..., None]
+DecodedInstruction = Tuple[Handler, Tuple[int, ...]]
+
+# Source templates for the specialised handlers. {a}, {b} are input
+# operands and {target} the write address, already resolved for the
+# parameter modes the handler is built for. Handlers index memory directly,
+# so every side effect must come after the last memory access: an
+# IndexError then leaves the machine untouched and the instruction can be
+# replayed through read_at/write_at. An IndexError from a channel is
+# wrapped in a ChannelError so it is never taken for one from memory.
+HANDLER_TEMPLATES = {
+    OpCode.ADD: (
+        'target = {target}\n'
+        'memory[target] = {a} + {b}\n'
+        'if target in computer.decoded_cells: computer.invalidate(target)\n'
+        'computer.instruction_pointer = next_ip\n'
+    ),
+    OpCode.MULTIPLY: (
+        'target = {target}\n'
+        'memory[target] = {a} * {b}\n'
+        'if target in computer.decoded_cells: computer.invalidate(target)\n'
+        'computer.instruction_pointer = next_ip\n'
+    ),
+    OpCode.INPUT: (
+        'target = {target}\n'
+        'try: value = computer.inputs.get()\n'
+        'except IndexError as error: raise ChannelError(error)\n'
+        'if value is None:\n'
+        '    computer.waiting_for_input = True\n'
+        '    return\n'
+        'if target < len(memory): memory[target] = value\n'
+        'else: computer.write_at(target, value)\n'
+        'if target in computer.decoded_cells: computer.invalidate(target)\n'
+        'computer.instruction_pointer = next_ip\n'
+    ),
+    OpCode.OUTPUT: (
+        'value = {a}\n'
+        'computer.instruction_pointer = next_ip\n'
+        'try: computer.outputs.put(value)\n'
+        'except IndexError as error: raise ChannelError(error)\n'
+    ),
+    OpCode.JUMP_IF_TRUE: (
+        'computer.instruction_pointer = {b} if {a} != 0 else next_ip\n'
+    ),
+    OpCode.JUMP_IF_FALSE: (
+        'computer.instruction_pointer = {b} if {a} == 0 else next_ip\n'
+    ),
+    OpCode.LESS_THAN: (
+        'target = {target}\n'
+        'memory[target] = 1 if {a} < {b} else 0\n'
+        'if target in computer.decoded_cells: computer.invalidate(target)\n'
+        'computer.instruction_pointer = next_ip\n'
+    ),
+    OpCode.EQUALS: (
+        'target = {target}\n'
+        'memory[target] = 1 if {a} == {b} else 0\n'
+        'if target in computer.decoded_cells: computer.invalidate(target)\n'
+        'computer.instruction_pointer = next_ip\n'
+    ),
+    OpCode.ADJUST_RELATIVE_BASE: (
+        'computer.relative_base += {a}\n'
+        'computer.instruction_pointer = next_ip\n'
+    ),
+    OpCode.HALT: (
+        'computer.halted = True\n'
+        'computer.instruction_pointer = next_ip\n'
+    ),
+}
+
+HANDLERS: Dict[int, Tuple[Handler, int]] = {}
+
+# Writes past the end of memory grow it geometrically, unless the address is
+# this far past the end, in which case it is stored in the sparse overflow.
+MAX_MEMORY_GAP = 1 << 16
+
+def input_operand(name: str, mode: ParameterMode) -> str:
+    if mode == ParameterMode.POSITION:
+        return f'memory[{name}]'
+    if mode == ParameterMode.RELATIVE:
+        return f'memory[computer.relative_base + {name}]'
+    return name
+
+def output_operand(name: str, mode: ParameterMode) -> str:
+    if mode == ParameterMode.RELATIVE:
+        return f'computer.relative_base + {name}'
+    return name
+
+def get_handler(value: int) -> Tuple[Handler, int]:
+    """Return the handler and length for an instruction value, building the
+    handler on first use.
+
+    Handlers are shared between machines since they depend only on the
+    opcode and parameter modes, not on the parameter values.
+    """
+    cached = HANDLERS.get(value)
+    if cached is not None:
+        return cached
+
+    opcode = OpCode(value % 100)
+    parameter_modes = value // 100
+    input_parameters, output_parameters = OPCODE_PARAMETERS[opcode]
+    names = ['a', 'b', 'c'][:input_parameters + output_parameters]
+
+    operands: Dict[str, str] = {}
+    for name in names[:input_parameters]:
+        operands[name] = input_operand(name, ParameterMode(parameter_modes % 10))
+        parameter_modes //= 10
+    for name in names[input_parameters:]:
+        operands['target'] = output_operand(name, ParameterMode(parameter_modes % 10))
+        parameter_modes //= 10
+
+    body = HANDLER_TEMPLATES[opcode].format(**operands)
+    source = (
+        f'def handler({", ".join(["computer", "next_ip"] + names)}):\n'
+        '    memory = computer.memory\n'
+        + ''.join(f'    {line}\n' for line in body.splitlines())
+    )
+    namespace: Dict[str, Handler] = {}
+    exec(source, {'ChannelError': ChannelError}, namespace)
+    cached = (namespace['handler'], 1 + len(names))
+    HANDLERS[value] = cached
+    return cached
+
+# Tier 2: straight-line runs of instructions compiled into one function.
+# A block ends after a jump, input, output or halt. Its function keeps the
+# relative base in a local and stores it back on every exit. ip tracks the
+# instruction being executed so an IndexError can be replayed from it, and
+# a write into any decoded or compiled cell leaves the block straight away.
+Block = Callable[['Computer'], None]
+
+JIT_THRESHOLD = 8
+# Blocks that keep being rewritten are left to the decoded handlers
+JIT_MAX_RECOMPILES = 2
+
+BLOCK_EXIT = 'computer.instruction_pointer = {next_ip}; computer.relative_base = rb'
+WRITE_CHECK = 'if t in code_cells: ' + BLOCK_EXIT + '; computer.invalidate(t); return'
+
+BLOCK_TEMPLATES = {
+    OpCode.ADD: ['t = {target}', 'memory[t] = {a} + {b}', WRITE_CHECK],
+    OpCode.MULTIPLY: ['t = {target}', 'memory[t] = {a} * {b}', WRITE_CHECK],
+    OpCode.LESS_THAN: ['t = {target}', 'memory[t] = 1 if {a} < {b} else 0', WRITE_CHECK],
+    OpCode.EQUALS: ['t = {target}', 'memory[t] = 1 if {a} == {b} else 0', WRITE_CHECK],
+    OpCode.ADJUST_RELATIVE_BASE: ['rb += {a}'],
+    OpCode.INPUT: [
+        't = {target}',
+        'try: value = computer.inputs.get()',
+        'except IndexError as error: ' + BLOCK_EXIT.format(next_ip='ip') + '; raise ChannelError(error)',
+        'if value is None: computer.waiting_for_input = True; ' + BLOCK_EXIT.format(next_ip='ip') + '; return',
+        'if t < len(memory): memory[t] = value',
+        'else: computer.write_at(t, value)',
+        BLOCK_EXIT,
+        'if t in code_cells: computer.invalidate(t)',
+        'return',
+    ],
+    OpCode.OUTPUT: [
+        'value = {a}',
+        BLOCK_EXIT,
+        'try: computer.outputs.put(value)',
+        'except IndexError as error: raise ChannelError(error)',
+        'return',
+    ],
+    OpCode.JUMP_IF_TRUE: [
+        'computer.instruction_pointer = {b} if {a} != 0 else {next_ip}',
+        'computer.relative_base = rb',
+        'return',
+    ],
+    OpCode.JUMP_IF_FALSE: [
+        'computer.instruction_pointer = {b} if {a} == 0 else {next_ip}',
+        'computer.relative_base = rb',
+        'return',
+    ],
+    OpCode.HALT: ['computer.halted = True', BLOCK_EXIT, 'return'],
+}
+
+def block_operand(parameter: int, mode: ParameterMode) -> str:
+    if mode == ParameterMode.POSITION:
+        return f'memory[{parameter}]'
+    if mode == ParameterMode.RELATIVE:
+        return f'memory[rb + {parameter}]'
+    return str(parameter)
+
+def compile_block(read_at: Callable[[int], int], address: int) -> Tuple[Block, int]:
+    """Compile the block starting at address, returning it and the address
+    just past its last instruction."""
+    body: List[str] = []
+    ip = address
+
+    while True:
+        value = read_at(ip)
+        try:
+            opcode = OpCode(value % 100)
+        except ValueError:
+            if ip == address:
+                raise
+            # Leave invalid code for the interpreter to report
+            body.append(BLOCK_EXIT.format(next_ip=ip))
+            break
+
+        parameter_modes = value // 100
+        input_parameters, output_parameters = OPCODE_PARAMETERS[opcode]
+        next_ip = ip + 1 + input_parameters + output_parameters
+
+        operands = {'next_ip': str(next_ip)}
+        for i, name in enumerate(['a', 'b'][:input_parameters]):
+            operands[name] = block_operand(read_at(ip + 1 + i), ParameterMode(parameter_modes % 10))
+            parameter_modes //= 10
+        if output_parameters:
+            parameter = read_at(ip + 1 + input_parameters)
+            if ParameterMode(parameter_modes % 10) == ParameterMode.RELATIVE:
+                operands['target'] = f'rb + {parameter}'
+            else:
+                operands['target'] = str(parameter)
+
+        body.append(f'ip = {ip}')
+        body.extend(line.format(**operands) for line in BLOCK_TEMPLATES[opcode])
+        ip = next_ip
+
+        if body[-1] == 'return':
+            break
+
+    source = (
+        'def block(computer):\n'
+        '    memory = computer.memory\n'
+        '    code_cells = computer.decoded_cells\n'
+        '    rb = computer.relative_base\n'
+        '    try:\n'
+        + ''.join(f'        {line}\n' for line in body) +
+        '    except IndexError:\n'
+        '        computer.instruction_pointer = ip\n'
+        '        computer.relative_base = rb\n'
+        '        raise\n'
+    )
+    namespace: Dict[str, Block] = {}
+    exec(compile(source, f'<block {address}>', 'exec'), {'ChannelError': ChannelError}, namespace)
+    return namespace['block'], ip
+
+class ChannelError(Exception):
+    """Carries an IndexError raised by a channel out of the run loops,
+    which otherwise replay the instruction as a memory access past the end.
+    execute() raises the original error again."""
+    def __init__(self, error: IndexError):
+        super().__init__(error)
+        self.error = error
+
+class Channel(ABC):
+    """A stream of values into or out of a machine.
+
+    copy() is used when a machine is forked or snapshotted; by default the
+    copy is the same channel.
+    """
+    def copy(self: C) -> C:
+        return self
+
+class InputChannel(Channel):
+    """A stream a machine reads its input from."""
+    @abstractmethod
+    def get(self) -> Optional[int]:
+        """The next value, or None when no value is available yet, which
+        makes an input instruction wait."""
+
+class OutputChannel(Channel):
+    """A stream a machine writes its output to."""
+    @abstractmethod
+    def put(self, value: int):
+        pass
+
+    def extend(self, values: Iterable[int]):
+        for value in values:
+            self.put(value)
+
+class QueueChannel(InputChannel, OutputChannel):
+    """Buffers values in a deque. This is the default for both directions."""
+    def __init__(self, values: Iterable[int]=()):
+        self.queue: Deque[int] = deque(values)
+
+    def get(self) -> Optional[int]:
+        if self.queue:
+            return self.queue.popleft()
+        return None
+
+    def put(self, value: int):
+        self.queue.append(value)
+
+    def extend(self, values: Iterable[int]):
+        self.queue.extend(values)
+
+    def take_all(self) -> List[int]:
+        values = list(self.queue)
+        self.queue.clear()
+        return values
+
+    def copy(self) -> 'QueueChannel':
+        return QueueChannel(self.queue)
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.queue)
+
+class GeneratorChannel(InputChannel):
+    """Input pulled lazily from an iterable. The machine waits once it is
+    exhausted."""
+    def __init__(self, values: Iterable[int]):
+        self.iterator = iter(values)
+
+    def get(self) -> Optional[int]:
+        return next(self.iterator, None)
+
+    def copy(self) -> 'GeneratorChannel':
+        self.iterator, other = tee(self.iterator)
+        return GeneratorChannel(other)
+
+class CallbackChannel(InputChannel, OutputChannel):
+    """Calls get/put functions supplied by the driver for every value."""
+    def __init__(self, get: Optional[Callable[[], Optional[int]]]=None, put: Optional[Callable[[int], None]]=None):
+        self.get_callback = get
+        self.put_callback = put
+
+    def get(self) -> Optional[int]:
+        assert self.get_callback
+        return self.get_callback()
+
+    def put(self, value: int):
+        assert self.put_callback
+        self.put_callback(value)
+
+class AsciiChannel(OutputChannel):
+    """Collects output text straight into a bytearray.
+
+    Values outside ASCII (the puzzle answers) are written as their decimal
+    representation, as get_ascii_output does.
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def put(self, value: int):
+        if 0 <= value <= 128:
+            self.buffer.append(value)
+        else:
+            self.buffer += str(value).encode()
+
+    def view(self) -> memoryview:
+        """The text written so far, without copying it."""
+        return memoryview(self.buffer)
+
+    def take_bytes(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+    def copy(self) -> 'AsciiChannel':
+        channel = AsciiChannel()
+        channel.buffer = bytearray(self.buffer)
+        return channel
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+BLOCK_TERMINATORS = {
+    OpCode.INPUT,
+    OpCode.OUTPUT,
+    OpCode.JUMP_IF_TRUE,
+    OpCode.JUMP_IF_FALSE,
+    OpCode.HALT,
+}
+
+class Profiler:
+    """Execution counts for the machines it is attached to, collected by a
+    separate run loop.
+
+    A machine only runs through the profiler when one is attached, so an
+    unprofiled machine pays nothing beyond a single check per run() call.
+
+    Basic blocks are counted by their start address, using the same block
+    boundaries as the JIT. Intcode has no call instruction, so the
+    collapsed stacks treat raising the relative base as entering a function
+    named after the block that raised it, and lowering it as returning.
+    """
+    def __init__(self):
+        self.opcodes: Counter[OpCode] = Counter()
+        self.addresses: Counter[int] = Counter()
+        self.blocks: Counter[int] = Counter()
+        self.stacks: Counter[Tuple[int, ...]] = Counter()
+        self.input_stalls = 0
+        self.wall_time = 0.0
+        self.machine_stacks: 'weakref.WeakKeyDictionary[Computer, Tuple[int, ...]]' = weakref.WeakKeyDictionary()
+
+    @property
+    def instructions(self) -> int:
+        return sum(self.opcodes.values())
+
+    def run(self, computer: 'Computer'):
+        start = time.perf_counter()
+        opcodes = self.opcodes
+        addresses = self.addresses
+        blocks = self.blocks
+        stacks = self.stacks
+        decoded = computer.decoded
+        stack = self.machine_stacks.get(computer, ())
+
+        block_start = -1
+        fall_through = -1
+
+        while not computer.halted and not computer.waiting_for_input:
+            address = computer.instruction_pointer
+            opcode = OpCode(computer.read_at(address) % 100)
+            relative_base = computer.relative_base
+
+            instruction = decoded.get(address)
+            if instruction is None:
+                instruction = computer.decode_at(address)
+            handler, args = instruction
+            try:
+                handler(computer, *args)
+            except IndexError:
+                computer.run_instruction()
+
+            if opcode == OpCode.INPUT and computer.waiting_for_input:
+                break
+
+            if address != fall_through:
+                block_start = address
+                blocks[address] += 1
+            fall_through = -1 if opcode in BLOCK_TERMINATORS else args[0]
 
-        for i, value in enumerate(program):
-            self.memory[i] = value
+            if computer.relative_base > relative_base:
+                stack += (block_start,)
+            elif computer.relative_base < relative_base and stack:
+                stack = stack[:-1]
+
+            opcodes[opcode] += 1
+            addresses[address] += 1
+            stacks[stack] += 1
+
+        self.machine_stacks[computer] = stack
+        if computer.waiting_for_input:
+            self.input_stalls += 1
+        self.wall_time += time.perf_counter() - start
+
+    def collapsed(self) -> str:
+        """Instruction counts per stack, in the collapsed format read by
+        flamegraph.pl and speedscope."""
+        lines: List[str] = []
+        for stack, count in sorted(self.stacks.items()):
+            frames = ['main'] + [f'fn_{address}' for address in stack]
+            lines.append(f'{";".join(frames)} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def report(self, top: int=10) -> str:
+        instructions = self.instructions
+        rate = instructions / self.wall_time if self.wall_time else 0
+        lines = [
+            f'Instructions: {instructions} in {self.wall_time:.3f}s ({rate:,.0f}/s, profiled)',
+            f'Input stalls: {self.input_stalls}',
+            '',
+            'Opcodes:',
+        ]
+        lines += [f'  {opcode.name:<20} {count}' for opcode, count in self.opcodes.most_common()]
+        lines += ['', 'Hottest addresses:']
+        lines += [f'  {address:<20} {count}' for address, count in self.addresses.most_common(top)]
+        lines += ['', 'Hottest blocks:']
+        lines += [f'  {address:<20} {count}' for address, count in self.blocks.most_common(top)]
+        return '\n'.join(lines)
+
+class Snapshot(NamedTuple):
+    memory: Tuple[int, ...]
+    overflow: Tuple[Tuple[int, int], ...]
+    instruction_pointer: int
+    relative_base: int
+    halted: bool
+    waiting_for_input: bool
+    inputs: InputChannel
+    outputs: OutputChannel
+
+class Computer:
+    def __init__(self, program: Program, log_output: bool=True, fast: bool=True, jit: bool=False, profiler: Optional[Profiler]=None):
+        self.memory: List[int] = list(program)
+        self.overflow: Dict[int, int] = {}
 
         self.log_output = log_output
         self.instruction_pointer = 0
         self.relative_base = 0
         self.halted = False
         self.waiting_for_input = False
-        self.inputs: List[int] = []
-        self.outputs: List[int] = []
+        self.inputs: InputChannel = QueueChannel()
+        self.outputs: OutputChannel = QueueChannel()
+
+        # Decoded instruction cache for fast mode, keyed by address. Any
+        # write to a cell in decoded_cells drops the instructions covering it.
+        self.fast = fast
+        self.decoded: Dict[int, DecodedInstruction] = {}
+        self.decoded_cells: Set[int] = set()
+        self.code_modified = False
+
+        # Compiled blocks for the JIT, keyed by start address, with the
+        # blocks covering each cell, hit counts for uncompiled addresses and
+        # how often each block has been invalidated.
+        self.jit = jit
+        self.profiler = profiler
+        self.blocks: Dict[int, Block] = {}
+        self.cell_blocks: Dict[int, List[int]] = {}
+        self.hits: Dict[int, int] = {}
+        self.recompiles: Dict[int, int] = {}
 
-        self.instructions = {
+        self.instructions = self.instruction_table()
+
+    def instruction_table(self) -> Dict[OpCode, Callable[..., None]]:
+        return {
             OpCode.ADD: self.instruction_add,
             OpCode.MULTIPLY: self.instruction_multiply,
             OpCode.INPUT: self.instruction_input,
@@ -67,13 +573,166 @@ class Computer:
             OpCode.HALT: self.instruction_halt
         }
 
-    def run(self, inputs: Union[List[int], str]=[]):
+    def fork(self) -> 'Computer':
+        """Return an independent copy of this machine in its current state.
+
+        The copy keeps the decoded instruction cache, so it resumes at full
+        speed without decoding the program again.
+        """
+        computer = copy.copy(self)
+        computer.memory = self.memory.copy()
+        computer.overflow = self.overflow.copy()
+        computer.inputs = self.inputs.copy()
+        computer.outputs = self.outputs.copy()
+        computer.decoded = self.decoded.copy()
+        computer.decoded_cells = self.decoded_cells.copy()
+        computer.blocks = self.blocks.copy()
+        computer.cell_blocks = {cell: starts.copy() for cell, starts in self.cell_blocks.items()}
+        computer.hits = self.hits.copy()
+        computer.recompiles = self.recompiles.copy()
+        computer.instructions = computer.instruction_table()
+        return computer
+
+    def snapshot(self) -> Snapshot:
+        return Snapshot(
+            tuple(self.memory),
+            tuple(self.overflow.items()),
+            self.instruction_pointer,
+            self.relative_base,
+            self.halted,
+            self.waiting_for_input,
+            self.inputs.copy(),
+            self.outputs.copy()
+        )
+
+    def restore(self, snapshot: Snapshot):
+        """Rewind this machine to a snapshot taken from it or from a fork."""
+        self.memory[:] = snapshot.memory
+        self.overflow = dict(snapshot.overflow)
+        self.instruction_pointer = snapshot.instruction_pointer
+        self.relative_base = snapshot.relative_base
+        self.halted = snapshot.halted
+        self.waiting_for_input = snapshot.waiting_for_input
+        self.inputs = snapshot.inputs.copy()
+        self.outputs = snapshot.outputs.copy()
+
+        # Code may have been rewritten since the snapshot was taken
+        self.decoded.clear()
+        self.decoded_cells.clear()
+        self.blocks.clear()
+        self.cell_blocks.clear()
+        self.hits.clear()
+        self.recompiles.clear()
+
+    def run(self, inputs: Union[Iterable[int], str, bytes]=()):
+        """Run until the machine halts or needs input it hasn't been given.
+
+        inputs are put on the input channel, so it must also be an output
+        channel, as a QueueChannel is. Strings are sent as ASCII.
+
+        With log_output, the values output during the run are printed once
+        it returns rather than from the output instruction.
+        """
         if isinstance(inputs, str):
-            inputs = [ord(i) for i in inputs]
-        self.inputs = inputs
+            inputs = inputs.encode()
+        if inputs:
+            assert isinstance(self.inputs, OutputChannel)
+            self.inputs.extend(inputs)
         self.waiting_for_input = False
+
+        if self.log_output and isinstance(self.outputs, QueueChannel):
+            logged = len(self.outputs)
+            self.execute()
+            for value in islice(self.outputs, logged, None):
+                print('Output:', value)
+        else:
+            self.execute()
+
+    def execute(self):
+        try:
+            if not self.fast:
+                while not self.halted and not self.waiting_for_input:
+                    self.run_instruction()
+            elif self.profiler is not None:
+                self.profiler.run(self)
+            elif self.jit:
+                self.run_jit()
+            else:
+                self.run_decoded()
+        except ChannelError as error:
+            raise error.error from None
+
+    def run_decoded(self):
+        decoded = self.decoded
         while not self.halted and not self.waiting_for_input:
-            self.run_instruction()
+            instruction = decoded.get(self.instruction_pointer)
+            if instruction is None:
+                instruction = self.decode_at(self.instruction_pointer)
+            handler, args = instruction
+            try:
+                handler(self, *args)
+            except IndexError:
+                # Memory access past the end, replay through read_at/write_at
+                self.run_instruction()
+
+    def run_jit(self):
+        blocks = self.blocks
+        decoded = self.decoded
+        hits = self.hits
+        recompiles = self.recompiles
+
+        while not self.halted and not self.waiting_for_input:
+            address = self.instruction_pointer
+            try:
+                block = blocks.get(address)
+                if block is not None:
+                    block(self)
+                    continue
+
+                count = hits.get(address, 0) + 1
+                if count >= JIT_THRESHOLD and recompiles.get(address, 0) < JIT_MAX_RECOMPILES:
+                    hits.pop(address, None)
+                    self.compile_at(address)(self)
+                    continue
+                hits[address] = count
+
+                instruction = decoded.get(address)
+                if instruction is None:
+                    instruction = self.decode_at(address)
+                handler, args = instruction
+                handler(self, *args)
+            except IndexError:
+                self.run_instruction()
+
+    def compile_at(self, address: int) -> Block:
+        block, end = compile_block(self.read_at, address)
+        self.blocks[address] = block
+        for cell in range(address, end):
+            self.cell_blocks.setdefault(cell, []).append(address)
+        self.decoded_cells.update(range(address, end))
+        return block
+
+    def decode_at(self, address: int) -> DecodedInstruction:
+        handler, length = get_handler(self.read_at(address))
+
+        if address + length <= len(self.memory):
+            parameters = tuple(self.memory[address + 1:address + length])
+        else:
+            parameters = tuple(self.read_at(address + i) for i in range(1, length))
+        instruction: DecodedInstruction = (handler, (address + length,) + parameters)
+
+        self.decoded[address] = instruction
+        self.decoded_cells.update(range(address, address + length))
+        return instruction
+
+    def invalidate(self, address: int):
+        """Drop any decoded instruction overlapping a modified cell."""
+        self.code_modified = True
+        for start in range(address - 3, address + 1):
+            self.decoded.pop(start, None)
+        for start in self.cell_blocks.pop(address, ()):
+            if self.blocks.pop(start, None):
+                self.recompiles[start] = self.recompiles.get(start, 0) + 1
 
     def run_instruction(self):
         opcode, inputs, outputs = self.read_instruction()
@@ -121,30 +780,47 @@ class Computer:
 
     def read_at(self, index: int) -> int:
         assert index >= 0
-        return self.memory[index]
+        if index < len(self.memory):
+            return self.memory[index]
+        return self.overflow.get(index, 0)
 
     def write_at(self, index: int, value: int):
         assert index >= 0
-        self.memory[index] = value
+        size = len(self.memory)
+        if index >= size:
+            if index - size < MAX_MEMORY_GAP:
+                self.grow_memory(max(index + 1, 2 * size))
+            else:
+                self.overflow[index] = value
+        if index < len(self.memory):
+            self.memory[index] = value
+        if index in self.decoded_cells:
+            self.invalidate(index)
 
-    def get_output(self):
-        return self.outputs.pop(0)
+    def grow_memory(self, size: int):
+        # Extend in place so handlers holding a reference to memory stay valid
+        old_size = len(self.memory)
+        self.memory.extend([0] * (size - old_size))
 
-    def get_all_output(self):
-        output = self.outputs
-        self.outputs = []
-        return output
+        for index in [i for i in self.overflow if i < size]:
+            self.memory[index] = self.overflow.pop(index)
 
-    def get_ascii_output(self):
-        output = self.get_all_output()
-        output_str = ''
+    def get_output(self) -> int:
+        assert isinstance(self.outputs, QueueChannel)
+        value = self.outputs.get()
+        if value is None:
+            raise IndexError('No output available')
+        return value
 
-        for o in output:
-            if o > 128:
-                output_str += str(o)
-            else:
-                output_str += chr(o)
-        return output_str
+    def get_all_output(self) -> List[int]:
+        assert isinstance(self.outputs, QueueChannel)
+        return self.outputs.take_all()
+
+    def get_ascii_output(self) -> str:
+        if isinstance(self.outputs, AsciiChannel):
+            return self.outputs.take_bytes().decode('latin-1')
+
+        return ''.join(str(o) if o > 128 else chr(o) for o in self.get_all_output())
 
     def instruction_add(self, input_1: int, input_2: int, output: int):
         self.write_at(output, input_1 + input_2)
@@ -153,17 +829,15 @@ class Computer:
         self.write_at(output, input_1 * input_2)
 
     def instruction_input(self, output: int):
-        if len(self.inputs) > 0:
-            input = self.inputs.pop(0)
+        input = self.inputs.get()
+        if input is not None:
             self.write_at(output, input)
         else:
             self.waiting_for_input = True
             self.instruction_pointer -= 2
 
     def instruction_output(self, input: int):
-        self.outputs.append(input)
-        if self.log_output:
-            print('Output:',input)
+        self.outputs.put(input)
 
     def instruction_jump_if_true(self, input: int, next_instruction: int):
         if input != 0:
@@ -187,6 +861,174 @@ class Computer:
     def instruction_halt(self):
         self.halted = True
 
+class Pipeline:
+    """Machines wired in series, each one's output channel being the next
+    one's input channel.
+
+    With feedback the last machine's output goes back to the first, and the
+    pipeline runs until the last machine halts.
+    """
+    def __init__(self, computers: List[Computer], feedback: bool=False):
+        self.computers = computers
+        self.feedback = feedback
+
+        for computer, next_computer in zip(computers, computers[1:]):
+            assert isinstance(next_computer.inputs, OutputChannel)
+            computer.outputs = next_computer.inputs
+
+        if feedback:
+            assert isinstance(computers[0].inputs, OutputChannel)
+            computers[-1].outputs = computers[0].inputs
+
+    def run(self, signal: int) -> int:
+        """Send a signal into the first machine and return the last value
+        the final machine outputs."""
+        first = self.computers[0].inputs
+        assert isinstance(first, OutputChannel)
+        first.put(signal)
+        last = self.computers[-1]
+
+        while True:
+            for computer in self.computers:
+                computer.run()
+            if last.halted or not self.feedback:
+                break
+
+        output = last.outputs
+        assert isinstance(output, QueueChannel)
+        return output.take_all()[-1]
+
+class BatchRunner:
+    """Run one program many times from a clean state on a single machine.
+
+    Memory is reset from the pristine image with a slice copy after every
+    run, and instructions decoded from unmodified code are kept across runs,
+    so each probe costs only the instructions it executes.
+    """
+    def __init__(self, program: Program):
+        self.program = list(program)
+        self.computer = Computer(program, log_output=False)
+        self.decoded: Dict[int, DecodedInstruction] = {}
+        self.used = False
+
+    def run(self, inputs: List[int]=[], patch: Optional[Patch]=None) -> Computer:
+        """Run the program from boot and return the machine it ran on.
+
+        The returned machine is reused by the next call, so read whatever is
+        needed from it first.
+        """
+        if self.used:
+            self.reset()
+        self.used = True
+
+        computer = self.computer
+        if patch:
+            for index, value in patch.items():
+                computer.write_at(index, value)
+        computer.run(inputs)
+        return computer
+
+    def keep_pristine_instructions(self):
+        decoded = self.computer.decoded
+        if not self.computer.code_modified and len(decoded) == len(self.decoded):
+            return
+
+        program = self.program
+        for address in decoded.keys() - self.decoded.keys():
+            handler, args = decoded[address]
+            if program[address:args[0]] == self.computer.memory[address:args[0]]:
+                self.decoded[address] = decoded[address]
+
+    def reset(self):
+        self.keep_pristine_instructions()
+
+        computer = self.computer
+        computer.memory[:] = self.program
+        computer.overflow.clear()
+        computer.instruction_pointer = 0
+        computer.relative_base = 0
+        computer.halted = False
+        computer.waiting_for_input = False
+        computer.inputs = QueueChannel()
+        computer.outputs = QueueChannel()
+
+        if computer.code_modified or len(computer.decoded) != len(self.decoded):
+            computer.decoded = self.decoded.copy()
+            computer.code_modified = False
+
+def get_all_output(computer: Computer) -> List[int]:
+    return computer.get_all_output()
+
+batch_runner: Optional[BatchRunner] = None
+
+def init_batch_worker(program: Program):
+    global batch_runner
+    batch_runner = BatchRunner(program)
+
+def run_batch_chunk(jobs: List[Tuple[List[int], Optional[Patch]]], result: Callable[[Computer], T]) -> List[T]:
+    assert batch_runner
+    return [result(batch_runner.run(inputs, patch)) for inputs, patch in jobs]
+
+@overload
+def run_batch(
+    program: Program,
+    inputs: Optional[Iterable[List[int]]]=None,
+    patches: Optional[Iterable[Optional[Patch]]]=None,
+    *,
+    processes: Optional[int]=None
+) -> List[List[int]]: ...
+
+@overload
+def run_batch(
+    program: Program,
+    inputs: Optional[Iterable[List[int]]],
+    patches: Optional[Iterable[Optional[Patch]]],
+    result: Callable[[Computer], T],
+    processes: Optional[int]=None
+) -> List[T]: ...
+
+@overload
+def run_batch(
+    program: Program,
+    inputs: Optional[Iterable[List[int]]]=None,
+    patches: Optional[Iterable[Optional[Patch]]]=None,
+    *,
+    result: Callable[[Computer], T],
+    processes: Optional[int]=None
+) -> List[T]: ...
+
+def run_batch(
+    program: Program,
+    inputs: Optional[Iterable[List[int]]]=None,
+    patches: Optional[Iterable[Optional[Patch]]]=None,
+    result: Callable[[Computer], Any]=get_all_output,
+    processes: Optional[int]=None
+) -> List[Any]:
+    """Run a program once per input vector and/or memory patch.
+
+    Returns result(computer) for every run, in order. By default that is the
+    list of outputs. With processes set, the runs are split into chunks and
+    spread across a process pool, in which case result must be picklable.
+    """
+    assert inputs is not None or patches is not None
+    jobs = list(zip(
+        inputs if inputs is not None else repeat([]),
+        patches if patches is not None else repeat(None)
+    ))
+
+    if not processes:
+        runner = BatchRunner(program)
+        return [result(runner.run(inputs, patch)) for inputs, patch in jobs]
+
+    chunk_size = max(1, math.ceil(len(jobs) / (processes * 4)))
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+
+    with ProcessPoolExecutor(processes, initializer=init_batch_worker, initargs=(program,)) as executor:
+        results: List[Any] = []
+        for chunk_results in executor.map(run_batch_chunk, chunks, repeat(result)):
+            results.extend(chunk_results)
+        return results
+
 def read_program() -> Program:
     with open('input.txt') as f:
         return [int(v) for v in f.readline().split(',')]
@@ -0,0 +1,94 @@
+from typing import Dict, Iterable, Mapping, Optional, TextIO, Tuple
+from queue import Empty, SimpleQueue
+import sys
+import threading
+import time
+
+# x, y, tile value
+TileDiff = Tuple[int, int, int]
+
+HOME = '\x1b[H'
+CLEAR = '\x1b[2J'
+
+class Renderer:
+    """Draws a tile grid from a stream of diffs at no more than fps frames
+    per second.
+
+    The producer only queues diffs with push(). A separate thread applies
+    them to its own copy of the grid and redraws when a frame is due, so a
+    machine driving the grid runs at interpreter speed however often the
+    tiles change. Call close() to draw the final frame.
+    """
+    def __init__(self, chars: Mapping[int, str], fps: float=30, output: TextIO=sys.stdout, empty: str=' '):
+        self.chars = chars
+        self.empty = empty
+        self.frame_time = 1 / fps
+        self.output = output
+
+        self.tiles: Dict[Tuple[int, int], str] = {}
+        self.status = ''
+        self.changed = False
+        self.frames = 0
+
+        self.queue: SimpleQueue = SimpleQueue()
+        self.thread = threading.Thread(target=self.consume, daemon=True)
+        self.thread.start()
+
+    def push(self, diffs: Iterable[TileDiff], status: Optional[str]=None):
+        self.queue.put((list(diffs), status))
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def apply(self, item: Tuple[list, Optional[str]]):
+        diffs, status = item
+        for x, y, tile in diffs:
+            self.tiles[(x, y)] = self.chars[tile]
+        if status is not None:
+            self.status = status
+        self.changed = True
+
+    def consume(self):
+        self.output.write(HOME + CLEAR)
+        next_frame = time.perf_counter()
+
+        while True:
+            try:
+                item = self.queue.get(timeout=max(next_frame - time.perf_counter(), 0) if self.changed else None)
+            except Empty:
+                item = ()
+
+            # Take everything queued before deciding whether to draw
+            while item:
+                self.apply(item)
+                try:
+                    item = self.queue.get_nowait()
+                except Empty:
+                    item = ()
+
+            if item is None:
+                self.draw()
+                return
+
+            if self.changed and time.perf_counter() >= next_frame:
+                self.draw()
+                next_frame = time.perf_counter() + self.frame_time
+
+    def draw(self):
+        self.changed = False
+        self.frames += 1
+        if not self.tiles:
+            return
+
+        x_min = min(x for x, _ in self.tiles)
+        x_max = max(x for x, _ in self.tiles)
+        y_min = min(y for _, y in self.tiles)
+        y_max = max(y for _, y in self.tiles)
+
+        lines = [
+            ''.join(self.tiles.get((x, y), self.empty) for x in range(x_min, x_max + 1))
+            for y in range(y_min, y_max + 1)
+        ]
+        self.output.write(HOME + '\n'.join(lines) + '\n' + self.status + '\n')
+        self.output.flush()
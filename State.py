@@ -0,0 +1,81 @@
+from typing import List, Optional, Set, Tuple
+
+# Largest bounded part of a state space kept as one byte per state
+DENSE_LIMIT = 1 << 24
+
+class StatePacker:
+    """Packs a search state made of small non-negative ints, such as cell
+    indices, a level and a keymask, into a single int.
+
+    Each field gets its own run of bits, the first field in the lowest. All
+    fields but the last need an upper bound; the last can be left unbounded
+    with a limit of None. Hot loops can use shifts directly instead of
+    calling pack and unpack.
+    """
+    def __init__(self, *limits: Optional[int]):
+        assert all(limits[:-1]), 'Only the last field can be unbounded'
+        self.shifts: List[int] = []
+        self.masks: List[int] = []
+
+        shift = 0
+        for limit in limits:
+            self.shifts.append(shift)
+            if limit is None:
+                self.masks.append(-1)
+            else:
+                bits = max(limit - 1, 1).bit_length()
+                self.masks.append((1 << bits) - 1)
+                shift += bits
+
+        # Number of states the bounded fields can encode
+        self.bounded_size = 1 << shift
+
+    def pack(self, *values: int) -> int:
+        state = 0
+        for value, shift in zip(values, self.shifts):
+            state |= value << shift
+        return state
+
+    def unpack(self, state: int) -> Tuple[int, ...]:
+        return tuple((state >> shift) & mask for shift, mask in zip(self.shifts, self.masks))
+
+    def visited(self) -> 'VisitedStates':
+        return VisitedStates(self.bounded_size if self.bounded_size <= DENSE_LIMIT else None)
+
+class VisitedStates:
+    """A set of packed states.
+
+    With a block size, states below DENSE_LIMIT are kept in a bytearray
+    indexed by state, grown a block at a time, which suits states whose
+    bounded part is small enough even if the last field is not. States past
+    the limit, or every state without a block size, go in a set of ints.
+    """
+    def __init__(self, block: Optional[int]):
+        self.block = block or 1
+        self.limit = DENSE_LIMIT if block else 0
+        self.dense = bytearray(block or 0)
+        self.sparse: Set[int] = set()
+
+    def add(self, state: int) -> bool:
+        """Add state, returning whether it was new."""
+        if state >= self.limit:
+            if state in self.sparse:
+                return False
+            self.sparse.add(state)
+            return True
+
+        if state >= len(self.dense):
+            size = min((state // self.block + 1) * self.block, self.limit)
+            self.dense.extend(bytes(size - len(self.dense)))
+        if self.dense[state]:
+            return False
+        self.dense[state] = 1
+        return True
+
+    def __contains__(self, state: int) -> bool:
+        if state >= self.limit:
+            return state in self.sparse
+        return state < len(self.dense) and self.dense[state] == 1
+
+    def __len__(self) -> int:
+        return self.dense.count(1) + len(self.sparse)
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""Benchmark the Intcode machine models against every Intcode day.
+
+Each workload drives its day's program headless the way the day's solution
+does, with scripted inputs, and fails unless it gets the known answers. It
+is run in a fresh worker process per machine model so that peak RSS is per
+run. Instruction counts come from a separate profiled run, since the
+fast and JIT models do not count instructions.
+
+    ./benchmark.py --output before.json
+    ./benchmark.py --output after.json --compare before.json
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from collections import deque
+from itertools import permutations
+from multiprocessing import Pool
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(1, os.path.join(ROOT, '23'))
+
+from Grid import DenseGrid
+from Intcode import AsciiChannel, Computer, Pipeline, Profiler, Program, QueueChannel
+from network import COMPUTER_COUNT, run_nic
+
+SCAFFOLD = ord('#')
+
+Machine = Callable[[Program], Computer]
+Workload = Callable[[Machine], Tuple[int, ...]]
+
+MODELS: Dict[str, Dict[str, Any]] = {
+    'reference': {'fast': False},
+    'fast': {},
+    'jit': {'jit': True},
+}
+
+def read_day_program(day: int) -> Program:
+    with open(os.path.join(ROOT, f'{day:02}', 'input.txt')) as f:
+        return [int(v) for v in f.readline().split(',')]
+
+def day_02(machine: Machine) -> Tuple[int, ...]:
+    program = read_day_program(2)
+
+    def run(noun: int, verb: int) -> int:
+        computer = machine(program)
+        computer.write_at(1, noun)
+        computer.write_at(2, verb)
+        computer.run()
+        return computer.read_at(0)
+
+    # Part 2 tries nouns and verbs in turn, as the fallback search does
+    answer = next(
+        100 * noun + verb for noun in range(100) for verb in range(100) if run(noun, verb) == 19690720
+    )
+    return run(12, 2), answer
+
+def day_05(machine: Machine) -> Tuple[int, ...]:
+    program = read_day_program(5)
+    return tuple(last_output(machine(program), [system_id]) for system_id in (1, 5))
+
+def day_07(machine: Machine) -> Tuple[int, ...]:
+    # Boot one amplifier per phase and fork it into every chain, as
+    # 07/amplifiers.py does
+    program = read_day_program(7)
+    signals = []
+    for phases, feedback in (([0, 1, 2, 3, 4], False), ([5, 6, 7, 8, 9], True)):
+        booted = {}
+        for phase in phases:
+            booted[phase] = machine(program)
+            booted[phase].run([phase])
+        signals.append(max(
+            Pipeline([booted[phase].fork() for phase in settings], feedback).run(0)
+            for settings in permutations(phases)
+        ))
+    return tuple(signals)
+
+def day_09(machine: Machine) -> Tuple[int, ...]:
+    program = read_day_program(9)
+    return tuple(last_output(machine(program), [mode]) for mode in (1, 2))
+
+def day_11(machine: Machine) -> Tuple[int, ...]:
+    program = read_day_program(11)
+    results = []
+    for start in (0, 1):
+        computer = machine(program)
+        white = {(0, 0)} if start else set()
+        painted = set()
+        x, y, dx, dy = 0, 0, 0, 1
+
+        computer.run([start])
+        while not computer.halted:
+            color, turn = computer.get_all_output()
+            painted.add((x, y))
+            if color:
+                white.add((x, y))
+            else:
+                white.discard((x, y))
+            dx, dy = (dy, -dx) if turn else (-dy, dx)
+            x, y = x + dx, y + dy
+            computer.run([int((x, y) in white)])
+        # Part 2's answer is the letters the white panels spell, so count them
+        results.append(len(white) if start else len(painted))
+
+    return tuple(results)
+
+def day_13(machine: Machine) -> Tuple[int, ...]:
+    program = read_day_program(13)
+    output = run_outputs(machine(program), [])
+    blocks = sum(1 for tile in output[2::3] if tile == 2)
+
+    # Play with the greedy controller, the solution's default
+    program[0] = 2
+    computer = machine(program)
+    ball = paddle = score = 0
+
+    computer.run()
+    while True:
+        output = computer.get_all_output()
+        for i in range(0, len(output), 3):
+            x, _, tile = output[i:i + 3]
+            if x == -1:
+                score = tile
+            elif tile == 4:
+                ball = x
+            elif tile == 3:
+                paddle = x
+
+        if computer.halted:
+            break
+        computer.run([(ball > paddle) - (ball < paddle)])
+
+    return blocks, score
+
+def day_15(machine: Machine) -> Tuple[int, ...]:
+    # Map the area breadth first, keeping a droid on every frontier cell and
+    # forking it for each direction, as 15/explorer.py does
+    moves = {1: (0, -1), 2: (0, 1), 3: (-1, 0), 4: (1, 0)}
+    start = (0, 0)
+    distances = {start: 0}
+    walls = set()
+    oxygen = start
+    droids = deque([(start, machine(read_day_program(15)))])
+
+    while droids:
+        (x, y), droid = droids.popleft()
+        for command, (dx, dy) in moves.items():
+            neighbour = (x + dx, y + dy)
+            if neighbour in distances or neighbour in walls:
+                continue
+            moved = droid.fork()
+            moved.run([command])
+            response = moved.get_output()
+            if response == 0:
+                walls.add(neighbour)
+                continue
+            distances[neighbour] = distances[(x, y)] + 1
+            droids.append((neighbour, moved))
+            if response == 2:
+                oxygen = neighbour
+
+    minutes = {oxygen: 0}
+    queue = deque([oxygen])
+    while queue:
+        x, y = queue.popleft()
+        for dx, dy in moves.values():
+            neighbour = (x + dx, y + dy)
+            if neighbour in distances and neighbour not in minutes:
+                minutes[neighbour] = minutes[(x, y)] + 1
+                queue.append(neighbour)
+
+    return distances[oxygen], max(minutes.values())
+
+def day_17(machine: Machine) -> Tuple[int, ...]:
+    program = read_day_program(17)
+    computer = machine(program)
+    computer.run()
+    grid = DenseGrid.from_text(computer.get_ascii_output().strip().split('\n'), fill='.')
+    counts = grid.neighbour_counts([SCAFFOLD])
+    alignment = 0
+    for index in grid.find_all(SCAFFOLD):
+        if counts[index] == 4:
+            x, y = grid.point(index)
+            alignment += x * y
+
+    program[0] = 2
+    dust = last_output(machine(program), (
+        'A,B,A,C,A,B,C,B,C,B\n'
+        'L,10,R,8,L,6,R,6\n'
+        'L,8,L,8,R,8\n'
+        'R,8,L,6,L,10,L,10\n'
+        'n\n'
+    ))
+    return alignment, dust
+
+def day_19(machine: Machine) -> Tuple[int, ...]:
+    program = read_day_program(19)
+    affected = 0
+    for y in range(50):
+        for x in range(50):
+            affected += last_output(machine(program), [x, y])
+    return (affected,)
+
+def day_21(machine: Machine) -> Tuple[int, ...]:
+    program = read_day_program(21)
+    springscripts = [
+        ['NOT A T', 'NOT B J', 'OR T J', 'NOT C T', 'OR T J', 'AND D J', 'WALK'],
+        [
+            'OR E T', 'AND F T', 'OR H T', 'OR E J', 'AND I J', 'OR J T', 'NOT A J',
+            'NOT J J', 'AND B J', 'AND C J', 'NOT J J', 'AND D J', 'AND T J', 'RUN',
+        ],
+    ]
+    damage = []
+    for springscript in springscripts:
+        computer = machine(program)
+        computer.outputs = AsciiChannel()
+        computer.run('\n'.join(springscript) + '\n')
+        # The hull damage is written after the last line of text
+        damage.append(int(computer.get_ascii_output().rsplit('\n', 1)[-1]))
+    return tuple(damage)
+
+def day_23(machine: Machine) -> Tuple[int, ...]:
+    # Schedule the NICs as 23/network.py does, through its run_nic step
+    program = read_day_program(23)
+    computers = []
+    for address in range(COMPUTER_COUNT):
+        computers.append(machine(program))
+        computers[-1].run([address])
+    queues = [computer.inputs for computer in computers]
+    scheduled = [True] * COMPUTER_COUNT
+    ready = deque(range(COMPUTER_COUNT))
+    nat: List[Tuple[int, int]] = []
+    sent_y: List[int] = []
+
+    def send(address: int, x: int, y: int):
+        queue = queues[address]
+        assert isinstance(queue, QueueChannel)
+        queue.extend((x, y))
+        if not scheduled[address]:
+            scheduled[address] = True
+            ready.append(address)
+
+    def send_to_nat(group: int, x: int, y: int):
+        nat.append((x, y))
+
+    while True:
+        while ready:
+            address = ready.popleft()
+            if run_nic(computers[address], address, send, send_to_nat):
+                ready.append(address)
+            else:
+                scheduled[address] = False
+
+        x, y = nat[-1]
+        if sent_y and sent_y[-1] == y:
+            return nat[0][1], y
+        sent_y.append(y)
+        send(0, x, y)
+
+def day_25(machine: Machine) -> Tuple[int, ...]:
+    # The adventure has no answer to check without playing it, so walk
+    # around and check that every command is answered
+    computer = machine(read_day_program(25))
+    computer.outputs = AsciiChannel()
+    computer.run()
+    prompts = computer.get_ascii_output().count('Command?')
+    for command in ('inv', 'north', 'south', 'east', 'west', 'inv'):
+        computer.run(command + '\n')
+        prompts += computer.get_ascii_output().count('Command?')
+    return (prompts,)
+
+def run_outputs(computer: Computer, inputs: Union[List[int], str]) -> List[int]:
+    computer.run(inputs)
+    return computer.get_all_output()
+
+def last_output(computer: Computer, inputs: Union[List[int], str]) -> int:
+    return run_outputs(computer, inputs)[-1]
+
+# Workloads and the answers they must produce
+WORKLOADS: Dict[int, Tuple[Workload, Tuple[int, ...]]] = {
+    2: (day_02, (7210630, 3892)),
+    5: (day_05, (4601506, 5525561)),
+    7: (day_07, (206580, 2299406)),
+    9: (day_09, (2399197539, 35106)),
+    11: (day_11, (2016, 105)),
+    13: (day_13, (335, 15706)),
+    15: (day_15, (272, 398)),
+    17: (day_17, (2660, 790595)),
+    19: (day_19, (169,)),
+    21: (day_21, (19359969, 1140082748)),
+    23: (day_23, (22829, 15678)),
+    25: (day_25, (7,)),
+}
+
+def run_workload(day: int, machine: Machine):
+    """Run a workload, failing if it gets a wrong answer, so a broken model
+    is never timed."""
+    workload, expected = WORKLOADS[day]
+    answers = workload(machine)
+    if answers != expected:
+        raise AssertionError(f'Day {day} answered {answers}, expected {expected}')
+
+def profile_workload(day: int) -> Tuple[int, str]:
+    """Instruction count and collapsed stacks for a workload."""
+    profiler = Profiler()
+    run_workload(day, lambda program: Computer(program, log_output=False, profiler=profiler))
+    return profiler.instructions, profiler.collapsed()
+
+def time_workload(day: int, model: str) -> Dict[str, float]:
+    """Run in a fresh worker process, so ru_maxrss is for this run alone."""
+    options = MODELS[model]
+    start = time.perf_counter()
+    run_workload(day, lambda program: Computer(program, log_output=False, **options))
+    seconds = time.perf_counter() - start
+    return {
+        'seconds': seconds,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+def run_isolated(function: Callable, *args):
+    with Pool(1, maxtasksperchild=1) as pool:
+        return pool.apply(function, args)
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def benchmark(days: List[int], models: List[str], repeat: int, profile_dir: Optional[str]) -> Dict:
+    results: Dict = {'revision': git_revision(), 'days': {}}
+
+    for day in days:
+        instructions, collapsed = run_isolated(profile_workload, day)
+        print(f'Day {day}: {instructions:,} instructions')
+
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+            with open(os.path.join(profile_dir, f'day_{day:02}.folded'), 'w') as f:
+                f.write(collapsed)
+
+        day_results = {'instructions': instructions, 'models': {}}
+        for model in models:
+            runs = [run_isolated(time_workload, day, model) for _ in range(repeat)]
+            best = min(runs, key=lambda run: run['seconds'])
+            best['instructions_per_second'] = instructions / best['seconds']
+            day_results['models'][model] = best
+            print(
+                f'  {model:>9}: {best["seconds"]:8.3f}s '
+                f'{best["instructions_per_second"]:12,.0f} instructions/s '
+                f'{best["peak_rss_kb"] / 1024:8.1f} MiB peak RSS'
+            )
+
+        results['days'][str(day)] = day_results
+
+    return results
+
+def compare(results: Dict, baseline: Dict):
+    print(f'\nCompared to {baseline.get("revision") or "baseline"} (time ratio, lower is better):')
+    for day, day_results in results['days'].items():
+        baseline_day = baseline['days'].get(day)
+        if not baseline_day:
+            continue
+        for model, run in day_results['models'].items():
+            baseline_run = baseline_day['models'].get(model)
+            if baseline_run:
+                ratio = run['seconds'] / baseline_run['seconds']
+                print(f'  Day {day:>2} {model:>9}: {ratio:6.2f}x')
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Intcode machine models')
+    parser.add_argument('--days', type=int, nargs='+', default=list(WORKLOADS), choices=list(WORKLOADS))
+    parser.add_argument('--models', nargs='+', default=list(MODELS), choices=list(MODELS))
+    parser.add_argument('--repeat', type=int, default=1, help='runs per model, the fastest is kept')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', help='JSON results to compare against')
+    parser.add_argument('--profile', metavar='DIR', help='write collapsed stacks per day')
+    args = parser.parse_args()
+
+    results = benchmark(args.days, args.models, args.repeat, args.profile)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+if __name__ == '__main__':
+    main()